@@ -1,22 +1,32 @@
 import asyncio
+import heapq
+import json
 import re
+import resource
 import os
 import sys
 import select 
 import tty 
 import termios
 import textwrap
-from numpy import linspace
+import tracemalloc
+from numpy import (
+    arange, argwhere, array, bool_, concatenate, flatnonzero, float32,
+    float64, floor, full, int16, int32, linspace, maximum, minimum, rint,
+)
 from blessed import Terminal
 from copy import copy
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-from inspect import iscoroutinefunction
-from itertools import cycle, repeat
-from math import acos, cos, degrees, pi, radians, sin, sqrt
+from functools import lru_cache
+from inspect import iscoroutinefunction, signature
+from itertools import accumulate, cycle, repeat
+from math import acos, ceil, cos, degrees, pi, radians, sin, sqrt
 from random import randint, choice, gauss, random, shuffle
 from subprocess import call
-from time import sleep
+from time import perf_counter, process_time, sleep
+from types import MappingProxyType
 
 #TODO: a way to create whole puzzle rooms in one command
 
@@ -26,6 +36,16 @@ class Map_tile:
     """ 
     Holds the appearance, contents and state of each tile. 
     """
+    __slots__ = (
+        'tile', 'brightness_mod', 'passable', 'blocking', 'description',
+        'announcing', 'seen', 'announcement', 'distance_trigger', 'actors',
+        'items', 'is_animated', 'animation', 'magic', 'magic_destination',
+        'mutable', 'override_view', 'color_num', 'is_door', 'locked',
+        'door_type', 'prevent_pushing', 'use_action_func', 'use_action_kwargs',
+        'toggle_states', 'toggle_state_index', 'run_on_entry',
+        'run_on_entry_kwargs',
+    )
+
     def __init__(
         self, 
         passable=True,                      #actors can step through
@@ -67,6 +87,8 @@ class Map_tile:
         with map_dict[(0, 0)].tile.
         actors is a dictionary of actor names with value == True if 
         occupied by that actor, otherwise the key is deleted.
+        actors and items stay None until map_dict creates them for the first
+        actor or item that arrives.
         """
         if len(tile) > 1:
             self.tile = choice(tile)
@@ -80,12 +102,9 @@ class Map_tile:
         self.seen = seen
         self.announcement = announcement
         self.distance_trigger = distance_trigger
-        if not actors:
-            self.actors = defaultdict(lambda:None)
         #allows for new map_tiles to be initialized with an existing actor list
-        else:
-            self.actors = actors
-        self.items = defaultdict(lambda:None)
+        self.actors = actors
+        self.items = items
         self.is_animated = is_animated
         self.animation = animation
         self.magic = magic
@@ -104,8 +123,460 @@ class Map_tile:
         self.run_on_entry = run_on_entry
         self.run_on_entry_kwargs = run_on_entry_kwargs
 
+    def get_cell(self, coord=(0, 0)):
+        """
+        returns the tile's appearance at coord as (glyph, fg, bg).
+        color_num 7 and 8 leave the tile uncolored so the view can light it.
+        """
+        if self.is_animated:
+            return self.animation.get_cell(coord)
+        glyph, fg, bg = text_to_cell(self.tile)
+        if fg == -1 and self.color_num not in (7, 8):
+            fg = self.color_num
+        return (glyph, fg, bg)
+
+class Map_dict:
+    """
+    every tile of the map, addressed by coordinate: map_dict[x, y] returns a
+    Tile_view with the same attributes as a Map_tile.
+
+    the fields in array_fields are kept in 32x32 chunks of numpy arrays that
+    are only allocated when a tile inside them is first written, so reading
+    unexplored space costs nothing and gives back a solid wall. tile and
+    description are stored as ids into shared tables of glyphs and
+    descriptions. the rarely set fields (doors, use actions, actors,
+    items...) live in rich_fields, one dict per field holding only the tiles
+    whose value differs from the void's.
+    """
+    chunk_size = 32
+    array_fields = {
+        'materialized':bool_,
+        'passable':bool_,
+        'blocking':bool_,
+        'magic':bool_,
+        'seen':bool_,
+        'override_view':bool_,
+        'mutable':bool_,
+        'is_animated':bool_,
+        'color_num':int16,
+        'brightness_mod':float32,
+        'tile':int32, #an index into glyphs
+        'description':int32, #an index into descriptions
+        #how many solid and blocking actors are on the tile, kept up to date
+        #by Tile_contents:
+        'solid_count':int16,
+        'blocking_count':int16,
+    }
+
+    #array fields that hold an id into a table of shared values:
+    table_fields = ('tile', 'description')
+
+    def __init__(self):
+        self.chunks = {}
+        self.tables = {field:[] for field in self.table_fields}
+        self.table_ids = {field:{} for field in self.table_fields}
+        self.glyphs = self.tables['tile']
+        self.descriptions = self.tables['description']
+        self.materialized = 0
+        void = Map_tile(passable=False, blocking=True)
+        self.array_defaults = {
+            field:getattr(void, field, 0) for field in self.array_fields
+            if field != 'materialized' and field not in self.table_fields
+        }
+        self.array_defaults['materialized'] = False
+        for field in self.table_fields:
+            self.array_defaults[field] = self.table_id(field, getattr(void, field))
+        self.rich_defaults = {
+            field:getattr(void, field) for field in Map_tile.__slots__
+            if field not in self.array_fields and field not in ('actors', 'items')
+        }
+        self.rich_fields = {
+            field:{} for field in Map_tile.__slots__
+            if field not in self.array_fields
+        }
+
+    def __getitem__(self, coord):
+        return Tile_view(coord)
+
+    def __setitem__(self, coord, tile):
+        """ copies every field of a Map_tile onto coord """
+        for field in Map_tile.__slots__:
+            value = getattr(tile, field)
+            if field in ('actors', 'items') and value == None:
+                continue
+            self.set_field(coord, field, value)
+
+    def __contains__(self, coord):
+        return self.get_field(coord, 'materialized')
+
+    def table_id(self, field, value):
+        """ the id of value in the shared table of field, added if new """
+        value_ids = self.table_ids[field]
+        if value not in value_ids:
+            value_ids[value] = len(self.tables[field])
+            self.tables[field].append(value)
+        return value_ids[value]
+
+    def glyph_id(self, glyph):
+        return self.table_id('tile', glyph)
+
+    def get_chunk(self, coord):
+        """ the chunk holding coord, allocated and filled with walls if new """
+        chunk_key = (coord[0] // self.chunk_size, coord[1] // self.chunk_size)
+        if chunk_key not in self.chunks:
+            shape = (self.chunk_size, self.chunk_size)
+            self.chunks[chunk_key] = {
+                field:full(shape, self.array_defaults[field], dtype=dtype)
+                for field, dtype in self.array_fields.items()
+            }
+        return self.chunks[chunk_key]
+
+    def chunk_at(self, coord):
+        """
+        the chunk holding coord (None if it was never written) and coord's
+        index into its arrays. for reading several fields of one tile.
+        """
+        size = self.chunk_size
+        chunk = self.chunks.get((coord[0] // size, coord[1] // size))
+        return chunk, (coord[0] % size, coord[1] % size)
+
+    def field_at(self, coord, field):
+        """
+        one array field of coord read straight from its chunk array, the
+        fast path for hot loops. tile and description come back as ids.
+        """
+        size = self.chunk_size
+        chunk = self.chunks.get((coord[0] // size, coord[1] // size))
+        if chunk == None:
+            return self.array_defaults[field]
+        return chunk[field].item(coord[0] % size, coord[1] % size)
+
+    def fields_along(self, points, fields):
+        """
+        a list for each of fields (array fields) of its values at every one
+        of points, in order, from one region read over their bounding box.
+        """
+        xs, ys = zip(*points)
+        left, top = min(xs), min(ys)
+        outputs = self.regions(fields, (left, top), (max(xs) + 1, max(ys) + 1))
+        values = []
+        for field in fields:
+            grid = outputs[field].tolist()
+            values.append([grid[x - left][y - top] for x, y in points])
+        return values
+
+    def get_field(self, coord, field):
+        if field in self.array_fields:
+            value = self.field_at(coord, field)
+            if field in self.tables:
+                return self.tables[field][value]
+            return value
+        if field not in self.rich_fields:
+            raise AttributeError(field)
+        field_values = self.rich_fields[field]
+        if coord in field_values:
+            return field_values[coord]
+        elif field in ('actors', 'items'):
+            return Void_contents(coord, field)
+        return self.rich_defaults[field]
+
+    def set_field(self, coord, field, value):
+        self.set_fields(coord, ((field, value),))
+
+    def set_fields(self, coord, fields):
+        """ writes a sequence of (field, value) pairs to one tile """
+        chunk = self.get_chunk(coord)
+        index = (coord[0] % self.chunk_size, coord[1] % self.chunk_size)
+        if not chunk['materialized'][index]:
+            chunk['materialized'][index] = True
+            self.materialized += 1
+        for field, value in fields:
+            if field in self.array_fields:
+                if field in self.tables:
+                    value = self.table_id(field, value)
+                #changes to what blocks sight or movement invalidate cached views:
+                elif field in ('blocking', 'magic') and chunk[field][index] != value:
+                    map_changed()
+                elif field == 'passable' and chunk[field][index] != value:
+                    terrain_changed()
+                chunk[field][index] = value
+            elif field in self.rich_fields:
+                field_values = self.rich_fields[field]
+                default = self.rich_defaults.get(field)
+                #values that match the void are dropped rather than stored:
+                if (
+                    field in self.rich_defaults 
+                    and type(value) == type(default) 
+                    and value == default
+                ):
+                    field_values.pop(coord, None)
+                else:
+                    field_values[coord] = value
+            else:
+                raise AttributeError(field)
+
+    def add_to_field(self, coord, field, change=1):
+        """ adds change to a numeric array field without marking the tile """
+        chunk = self.get_chunk(coord)
+        chunk[field][coord[0] % self.chunk_size, coord[1] % self.chunk_size] += change
+
+    def region(self, field, top_left=(0, 0), bottom_right=(10, 10)):
+        """
+        returns a numpy array (indexed [x, y]) of one array field over the
+        rectangle from top_left up to but not including bottom_right.
+        """
+        return self.regions((field,), top_left, bottom_right)[field]
+
+    def regions(self, fields, top_left=(0, 0), bottom_right=(10, 10)):
+        """ region for several fields at once, as a dict of field to array """
+        (x_min, y_min), (x_max, y_max) = top_left, bottom_right
+        shape = (x_max - x_min, y_max - y_min)
+        outputs = {
+            field:full(shape, self.array_defaults[field], dtype=self.array_fields[field])
+            for field in fields
+        }
+        size = self.chunk_size
+        for chunk_x in range(x_min // size, (x_max - 1) // size + 1):
+            for chunk_y in range(y_min // size, (y_max - 1) // size + 1):
+                if (chunk_x, chunk_y) not in self.chunks:
+                    continue
+                chunk = self.chunks[chunk_x, chunk_y]
+                #overlap of the chunk and the region in world coords:
+                left, right = max(x_min, chunk_x * size), min(x_max, (chunk_x + 1) * size)
+                top, bottom = max(y_min, chunk_y * size), min(y_max, (chunk_y + 1) * size)
+                for field, output in outputs.items():
+                    output[left - x_min:right - x_min, top - y_min:bottom - y_min] = (
+                        chunk[field][left - chunk_x * size:right - chunk_x * size,
+                                     top - chunk_y * size:bottom - chunk_y * size]
+                    )
+        return outputs
+
+    def materialized_count(self):
+        return self.materialized
+
+    def materialized_coords(self):
+        for (chunk_x, chunk_y), chunk in self.chunks.items():
+            for x, y in zip(*chunk['materialized'].nonzero()):
+                yield (
+                    chunk_x * self.chunk_size + int(x), 
+                    chunk_y * self.chunk_size + int(y),
+                )
+
+class Tile_view:
+    """
+    the Map_tile interface to one coordinate of map_dict, reads and writes
+    go straight through to the chunk arrays or rich_fields.
+    """
+    __slots__ = ('coord',)
+
+    def __init__(self, coord):
+        object.__setattr__(self, 'coord', coord)
+
+    def __getattr__(self, field):
+        return map_dict.get_field(self.coord, field)
+
+    def __setattr__(self, field, value):
+        map_dict.set_field(self.coord, field, value)
+
+    def get_cell(self):
+        return Map_tile.get_cell(self, self.coord)
+
+class Void_contents(dict):
+    """ the empty actors or items of a tile that has never held any """
+    __slots__ = ('coord', 'contents_type')
+    tags = 0
+
+    def __init__(self, coord, contents_type):
+        self.coord = coord
+        self.contents_type = contents_type
+
+    def __getitem__(self, key):
+        return None
+
+    def __setitem__(self, key, value):
+        contents = Tile_contents(self.coord, self.contents_type)
+        contents[key] = value
+        map_dict.set_field(self.coord, self.contents_type, contents)
+
+class Tile_contents(dict):
+    """
+    the actors or items on one tile, keyed by name. looking up a name that
+    isn't there gives None.
+
+    adding and removing names keeps actor_index and item_index and the
+    tile's solid_count and blocking_count up to date. tags is every tag of
+    the actors here OR'd together (see actor_tags).
+
+    counted_tags holds the tags each actor was counted with when it arrived,
+    so that it's uncounted with the same ones when it leaves.
+    """
+    __slots__ = ('coord', 'contents_type', 'tag_summary', 'counted_tags')
+
+    def __init__(self, coord, contents_type):
+        self.coord = coord
+        self.contents_type = contents_type
+        self.tag_summary = None
+        self.counted_tags = {}
+
+    def __missing__(self, key):
+        return None
+
+    def __setitem__(self, key, value):
+        if self.contents_type == 'actors' and key not in self:
+            tags = getattr(actor_dict.get(key), 'tags', 0)
+            self.counted_tags[key] = tags
+            count_occupant(coord=self.coord, tags=tags, change=1)
+        dict.__setitem__(self, key, value)
+        spatial_indexes[self.contents_type].add(key, self.coord)
+        self.tag_summary = None
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        if self.contents_type == 'actors':
+            tags = self.counted_tags.pop(key, 0)
+            count_occupant(coord=self.coord, tags=tags, change=-1)
+        spatial_indexes[self.contents_type].remove(key, self.coord)
+        self.tag_summary = None
+
+    @property
+    def tags(self):
+        #worked out when first asked for, actors can be added to a tile
+        #before they're in actor_dict:
+        if self.tag_summary == None:
+            if self.contents_type != 'actors':
+                return 0
+            self.tag_summary = 0
+            for name in self:
+                self.tag_summary |= getattr(actor_dict.get(name), 'tags', 0)
+        return self.tag_summary
+
+class Spatial_index:
+    """
+    where every actor (or item) is, bucketed by bucket_size square areas of
+    the map so that nearby names can be found without probing each tile.
+
+    kind_of maps a name to what kind of thing it is, for nearest().
+    """
+    def __init__(self, bucket_size=8, kind_of=None):
+        self.bucket_size = bucket_size
+        self.kind_of = kind_of
+        self.clear()
+
+    def clear(self):
+        self.buckets = defaultdict(dict)
+        self.locations = {}
+
+    def bucket_of(self, coord):
+        return (coord[0] // self.bucket_size, coord[1] // self.bucket_size)
+
+    def add(self, name, coord):
+        if name in self.locations:
+            self.remove(name)
+        self.locations[name] = coord
+        self.buckets[self.bucket_of(coord)][name] = coord
+
+    def remove(self, name, coord=None):
+        """ with a coord, name is only removed if that's where it is """
+        if name not in self.locations:
+            return
+        if coord != None and self.locations[name] != coord:
+            return
+        bucket = self.bucket_of(self.locations.pop(name))
+        del self.buckets[bucket][name]
+        if not self.buckets[bucket]:
+            del self.buckets[bucket]
+
+    def in_rect(self, top_left=(0, 0), bottom_right=(10, 10)):
+        """ (name, coord) pairs inside the rectangle, edges included """
+        (left, top), (right, bottom) = top_left, bottom_right
+        (left_bucket, top_bucket) = self.bucket_of(top_left)
+        (right_bucket, bottom_bucket) = self.bucket_of(bottom_right)
+        found = []
+        for bucket_x in range(left_bucket, right_bucket + 1):
+            for bucket_y in range(top_bucket, bottom_bucket + 1):
+                bucket = (bucket_x, bucket_y)
+                if bucket not in self.buckets:
+                    continue
+                for name, (x, y) in self.buckets[bucket].items():
+                    if left <= x <= right and top <= y <= bottom:
+                        found.append((name, (x, y)))
+        return found
+
+    def within_radius(self, center=(0, 0), radius=5):
+        """
+        (name, coord) pairs no further than radius from center, the same
+        tiles as get_circle.
+        """
+        top_left = (center[0] - radius, center[1] - radius)
+        bottom_right = (center[0] + radius, center[1] + radius)
+        return [
+            (name, (x, y)) for name, (x, y) in self.in_rect(top_left, bottom_right)
+            if (x - center[0]) ** 2 + (y - center[1]) ** 2 <= radius ** 2
+        ]
+
+    def nearest(self, center=(0, 0), kind=None, radius=None, exclude=()):
+        """
+        the (name, coord) closest to center, optionally only of one kind and
+        no further than radius. None if there's nothing to find.
+
+        buckets are searched in square rings around center's bucket until
+        the next ring can't hold anything closer than what was found.
+        """
+        if not self.buckets:
+            return None
+        center_bucket = self.bucket_of(center)
+        last_ring = max(
+            max(abs(x - center_bucket[0]), abs(y - center_bucket[1]))
+            for x, y in self.buckets
+        )
+        if radius != None:
+            last_ring = min(last_ring, radius // self.bucket_size + 1)
+        best, best_distance = None, None
+        for ring in range(last_ring + 1):
+            for bucket in self.ring_buckets(center_bucket, ring):
+                if bucket not in self.buckets:
+                    continue
+                for name, coord in self.buckets[bucket].items():
+                    if name in exclude:
+                        continue
+                    if kind != None and self.kind_of(name) != kind:
+                        continue
+                    distance = sqrt(
+                        (coord[0] - center[0]) ** 2 + (coord[1] - center[1]) ** 2
+                    )
+                    if radius != None and distance > radius:
+                        continue
+                    if best_distance == None or distance < best_distance:
+                        best, best_distance = (name, coord), distance
+            #everything in the next ring is further than ring * bucket_size:
+            if best_distance != None and best_distance <= ring * self.bucket_size:
+                break
+        return best
+
+    def ring_buckets(self, center_bucket=(0, 0), ring=0):
+        """ the buckets at exactly ring steps (chebyshev) from center_bucket """
+        if ring == 0:
+            return [center_bucket]
+        center_x, center_y = center_bucket
+        buckets = []
+        for offset in range(-ring, ring + 1):
+            buckets.append((center_x + offset, center_y - ring))
+            buckets.append((center_x + offset, center_y + ring))
+        for offset in range(-ring + 1, ring):
+            buckets.append((center_x - ring, center_y + offset))
+            buckets.append((center_x + ring, center_y + offset))
+        return buckets
+
 class Actor:
     """ the representation of a single actor that lives on the map. """
+    __slots__ = (
+        'name', 'base_name', 'coord', 'speed', 'tile', 'tile_color',
+        'base_attack', 'health', 'hurtful', 'max_health', 'alive', 'moveable',
+        'is_animated', 'animation', 'leaves_body', 'holding_items',
+        'breakable', 'multi_tile_parent', 'blocking', 'description',
+        'y_hide_coord', 'solid', 'made_of', 'use_Action', 'tags',
+    )
+
     #TODO: a use action option for actors 
     # i.e.: use the actor's use action instead of the tiles if given a choice
     # possible uses:
@@ -164,12 +635,18 @@ class Actor:
         self.solid = solid
         self.made_of = made_of
         self.use_Action = use_action
+        self.tags = actor_tags(
+            name=name, blocking=blocking, solid=solid, 
+            multi_tile=multi_tile_parent != None,
+        )
 
     def update(self, coord=(0, 0)):
         if self.name in map_dict[self.coords()].actors:
             del map_dict[self.coords()].actors[self.name]
         self.coord = coord
         map_dict[self.coords()].actors[self.name] = True
+        if self.blocking or self.multi_tile_parent != None:
+            map_changed()
         # TODO: if a second (or third?) run on entry function is added, 
         # automatically put both the old and the new into a forked 
         # function with a list of paired functions and kwargs.
@@ -186,16 +663,18 @@ class Actor:
     def coords(self):
         return self.coord
 
-    def get_view(self):
+    def get_cell(self):
         """
-        returns the current appearance of the actor.
+        returns the current appearance of the actor as (glyph, fg, bg).
         With an animation, it returns the next frame.
         With a static tile, it returns the tile along with the color.
         """
         if self.is_animated:
-            return next(self.animation)
-        else:
-            return term.color(self.tile_color)(self.tile)
+            return self.animation.get_cell(self.coord)
+        glyph, fg, bg = text_to_cell(self.tile)
+        if fg == -1:
+            fg = self.tile_color
+        return (glyph, fg, bg)
 
 class Room:
     """
@@ -276,6 +755,16 @@ class Room:
             print("No room provided!")
 
 class Animation:
+    """
+    how an animated tile or actor looks from one frame to the next.
+
+    presets (and custom animations) are compiled once into frame tables by
+    compile_animation. the frame a cell shows is looked up from the global
+    animation phase, stepped once per frame by view_frame_loop, and the
+    cell's coord, so an Animation keeps no state of its own.
+    """
+    __slots__ = ('frames',)
+
     def __init__(
         self,
         animation=None,
@@ -285,205 +774,228 @@ class Animation:
         preset="none",
         background=None,
     ):
-        presets = {
-            'bars':{
-                'animation':(' ▁▂▃▄▅▆▇█'), 
-                'behavior':'walk both', 
-                'color_choices':'2'
-            },
-            'blob':{
-                'animation':('ööööÖ'),
-                'behavior':'loop tile',
-                'color_choices':('2')
-            },
-            'zombie':{
-                'animation':('ŻŻż'),
-                'behavior':'random',
-                'color_choices':(0xa7, 0xa8, 0xa9)
-            },
-            'leech':{
-                'animation':('⟆⟅'),
-                'behavior':'random',
-                'color_choices':(0x16, 0x22, 0x1c)
-            },
-            'critter':{
-                'animation':('.'),
-                'behavior':'random',
-                'color_choices':(0xac, 0xa6, 0xca)
-            },
-            'presence':{
-                'animation':('●'),
-                'behavior':'random',
-                #'color_choices':list(range(0xe8, 0xff))
-                'color_choices':list(range(0xf7, 0xff))
-            },
-            'bullet':{
-                'animation':('◦◦◦○'),
-                'behavior':'random',
-                'color_choices':'446'
-            },
-            'blank':{
-                'animation':' ', 
-                'behavior':'random', 
-                'color_choices':'0'
-            },
-            'door':{
-                'animation':('▯'), 
-                'behavior':'random', 
-                'color_choices':'78888'
-            },
-            'energy block':{
-                'animation':'▤▥▦▧▨▩', 
-                'behavior':'random', 
-                'color_choices':'456'
-            },
-            'explosion':{
-                'animation':('█▓▒'), 
-                'behavior':'random', 
-                'color_choices':'111333',
-                'background':'0111333'
-            },
-            'steam':{
-                'animation':('▖▘▙▚▛▜▝▞▟'), 
-                'behavior':'random', 
-                'color_choices':
-                    [i for i in list(range(0xf2, 0xfe))],
-                'background':
-                    [i for i in list(range(0xf2, 0xfe))],
-            },
-            'fire':{
-                'animation':'^∧', 
-                'behavior':'random', 
-                'color_choices':'3331'
-            },
-            'pulse':{
-                'animation':(base_tile), 
-                'behavior':'loop both',
-                'color_choices':
-                    [i for i in list(range(0xe8, 0xff, 2)) 
-                              + list(range(0xff, 0xe8, -2))],
-            },
-            'goo':{
-                'animation':('▒'), 
-                'behavior':'random',
-                'color_choices':(0x35, 0x36, 0x37, 0x38, 0x39),
-            },
-            'grass':{
-                'animation':('▒'), 
-                'behavior':'random',
-                'color_choices':(0x4c, 0x4c, 0x4c, 0x70),
-            },
-            'terminal':{
-                'animation':('▤▥▦▧▨▩'), 
-                'behavior':'random',
-                #'color_choices':(0x1c, 0x2e, 0x2e, 0x2e),
-                'color_choices':(0x4c, 0x4c, 0x4c, 0x70),
-            },
-            'loop test':{
-                'animation':('0123456789abcdefghi'), 
-                'behavior':'loop both', 
-                'color_choices':'33333344444'
-            },
-            'mouth':{
-                'animation':('✳✳✳✳✳✸✸'),
-                'behavior':'loop tile',
-                'color_choices':('456')
-            },
-            'nightmare':{
-                'animation':('      ▒▓▒ ▒▓▒'), 
-                'behavior':'random',
-                'color_choices':(0x34, 0x58),
-            },
-            'noise':{
-                'animation':('      ▒▓▒ ▒▓▒'), 
-                'behavior':'loop tile', 
-                'color_choices':(0xe9, 0xea),
-            },
-            'sparse noise':{
-                'animation':(' ' * 100 + '█▓▒'), 
-                'behavior':'random', 
-                'color_choices':'1' * 5 + '7'
-            },
-            'shimmer':{
-                'animation':(base_tile, base_tile), 
-                'behavior':'random', 
-                'color_choices':(0x0e, 0x19, 0x1f, 0x9f),
-            },
-            'spikes':{
-                'animation':('∧∧∧∧‸‸‸     '), 
-                'behavior':'loop both', 
-                'color_choices':'7'
-            },
-            #TODO: a use action that washes hands/fills bottles by default on water tile
-            #TODO: a bottle that can be poured on other elements.
-            'water':{
-                'animation':'███▒▒▒▓▓▓▒▒▒',
-                'behavior':'loop tile',
-                'color_choices':([0x11 for i in range(50)] + list(range(0x11, 0x15))),
-            },
-            'writhe':{
-                'animation':('╭╮╯╰╭╮╯╰'),
-                'behavior':'random',
-                'color_choices':'456'
-            }
-        }
         if preset:
-            preset_kwargs = presets[preset]
-            #calls init again using kwargs, but with preset set to None
-            #to avoid infinite recursion.
-            self.__init__(**preset_kwargs, preset=None)
-        else:
-            self.frame_number = 0
-            self.color_frame_number = 0
-            self.animation = animation
-            self.base_tile = base_tile
-            self.behavior = behavior
-            self.color_choices = color_choices
-            self.background = background
-    
+            preset_kwargs = get_animation_presets(base_tile)[preset]
+            animation = preset_kwargs['animation']
+            behavior = preset_kwargs['behavior']
+            color_choices = preset_kwargs['color_choices']
+            background = preset_kwargs.get('background')
+        if background:
+            background = tuple(background)
+        self.frames = compile_animation(
+            tuple(animation), behavior, tuple(color_choices), background
+        )
+
+    def get_cell(self, coord=(0, 0)):
+        """ the (glyph, fg, bg) cell at coord for the current frame """
+        phase = state_dict['animation phase'] or 0
+        cell_seed = coord[0] * 73856093 ^ coord[1] * 19349663
+        return tuple(
+            table[(phase + cell_seed) % len(table)] for table in self.frames
+        )
+
     def __next__(self):
-        behavior_lookup = {
-            'random':{'color':'random', 'tile':'random'},
-            'loop color':{'color':'loop', 'tile':'random'},
-            'loop tile':{'color':'random', 'tile':'loop'},
-            'loop both':{'color':'loop', 'tile':'loop'},
-            'walk color':{'color':'walk', 'tile':'random'},
-            'walk frame':{'color':'random', 'tile':'walk'},
-            'walk both':{'color':'walk', 'tile':'walk'},
-        }
+        return self.get_cell()
+
+class Particle_pool:
+    """
+    every short lived particle (steam, sparks, explosion debris...), kept in
+    numpy arrays rather than as actors with a task each.
+
+    a particle steps along the points of its line (see get_line) from where
+    it was spawned, one tile every speed seconds, and is gone when it
+    reaches the end. paths holds each particle's points, padded out with its
+    last one. update moves all of them at once and is called once per frame
+    by view_frame_loop, which draws them over whatever is on their tiles
+    (see check_contents_of_tile).
+    """
+    def __init__(self, capacity=1024, path_length=32):
+        self.capacity = 0
+        self.alive = full(0, False)
+        self.paths = full((0, path_length, 2), 0, dtype=int32)
+        self.speeds = full(0, 1, dtype=float64)
+        self.ages = full(0, 0, dtype=float64)
+        self.lifetimes = full(0, 0, dtype=float64)
+        self.damages = full(0, 0, dtype=int32)
+        self.presets = full(0, 0, dtype=int16)
+        self.palettes = full(0, -1, dtype=int16)
+        self.tiles = full((0, 2), 0, dtype=int32)
+        self.sources = []
+        self.descriptions = []
+        self.free_slots = []
+        self.animations, self.animation_numbers = [], {}
+        self.debris_palettes, self.debris_numbers = [], {}
+        self.tile_slots = {}
+        self.live_count = 0
+        self.last_update = perf_counter()
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """ makes room for capacity particles, keeping the live ones """
+        added = capacity - self.capacity
+        path_length = self.paths.shape[1]
+        self.alive = concatenate((self.alive, full(added, False)))
+        self.paths = concatenate(
+            (self.paths, full((added, path_length, 2), 0, dtype=int32))
+        )
+        self.speeds = concatenate((self.speeds, full(added, 1.)))
+        self.ages = concatenate((self.ages, full(added, 0.)))
+        self.lifetimes = concatenate((self.lifetimes, full(added, 0.)))
+        self.damages = concatenate((self.damages, full(added, 0, dtype=int32)))
+        self.presets = concatenate((self.presets, full(added, 0, dtype=int16)))
+        self.palettes = concatenate((self.palettes, full(added, -1, dtype=int16)))
+        self.tiles = concatenate((self.tiles, full((added, 2), 0, dtype=int32)))
+        self.sources.extend([None] * added)
+        self.descriptions.extend([None] * added)
+        self.free_slots.extend(reversed(range(self.capacity, capacity)))
+        self.capacity = capacity
+
+    def lengthen_paths(self, path_length):
+        """ makes room for lines of path_length points, padding the old ones """
+        added = path_length - self.paths.shape[1]
+        self.paths = concatenate(
+            (self.paths, self.paths[:, -1:].repeat(added, axis=1)), axis=1
+        )
+
+    def number_of(self, name, names, numbers, make):
+        if name not in numbers:
+            numbers[name] = len(names)
+            names.append(make(name))
+        return numbers[name]
+
+    def spawn(
+        self,
+        start_coords=(0, 0),
+        end_coords=(10, 10),
+        speed=.05,
+        preset='explosion',
+        damage=0,
+        debris=None,
+        source_actor=None,
+        description="A cloud of scalding steam!",
+    ):
+        """
+        sends a particle from start_coords towards end_coords, stopping short
+        at the first wall. returns its slot, or None if it can't move at all.
 
-        current_behavior = behavior_lookup[self.behavior]
-        #color behavior------------------------------------
-        if current_behavior['color'] == 'random':
-            color_choice = int(choice(self.color_choices))
-        elif current_behavior['color'] == 'loop':
-            color_choice = int(list(self.color_choices)[self.color_frame_number])
-            self.color_frame_number = (self.color_frame_number + 1) % len(self.color_choices)
-        elif current_behavior['color'] == 'walk':
-            self.color_frame_number = (
-                self.color_frame_number + randint(-1, 1)) % len(self.color_choices
+        with debris (a string of glyphs), there's a chance the tile it stops
+        on is left covered with one of them.
+        """
+        points = trim_line_at_wall(get_line(start_coords, end_coords))
+        if len(points) < 2:
+            return None
+        if not self.free_slots:
+            self.grow(self.capacity * 2)
+        if len(points) > self.paths.shape[1]:
+            self.lengthen_paths(len(points))
+        slot = self.free_slots.pop()
+        lifetime = (len(points) - 1) * speed
+        start_x, start_y = points[0]
+        self.alive[slot] = True
+        self.paths[slot, :len(points)] = points
+        self.paths[slot, len(points):] = points[-1]
+        self.speeds[slot] = speed
+        self.ages[slot] = 0
+        self.lifetimes[slot] = lifetime
+        self.damages[slot] = damage or 0
+        self.presets[slot] = self.number_of(
+            preset, self.animations, self.animation_numbers, 
+            lambda preset: Animation(preset=preset),
+        )
+        if debris:
+            self.palettes[slot] = self.number_of(
+                debris, self.debris_palettes, self.debris_numbers, str
             )
-            color_choice = int(list(self.color_choices)[self.color_frame_number])
-        else:
-            color_choice = 5 #purple
-        #tile behavior-------------------------------------
-        if current_behavior['tile'] == 'random':
-            tile_choice = choice(self.animation)
-        elif current_behavior['tile'] == 'loop':
-            tile_choice = list(self.animation)[self.frame_number]
-            self.frame_number = (self.frame_number + 1) % len(self.animation)
-        elif current_behavior['tile'] == 'walk':
-            self.frame_number = (self.frame_number + randint(-1, 1)) % len(self.animation)
-            tile_choice = list(self.animation)[self.frame_number]
         else:
-            tile_choice = '?'
-        #background behavior-------------------------------
-        if self.background:
-            background_choice = int(choice(self.background))
-        else:
-            background_choice = 0xe8 #background color.
-        #combined output
-        return term.on_color(background_choice)(term.color(color_choice)(tile_choice))
+            self.palettes[slot] = -1
+        self.tiles[slot] = start_x, start_y
+        self.sources[slot] = source_actor
+        self.descriptions[slot] = description
+        self.tile_slots[start_x, start_y] = slot
+        self.live_count += 1
+        return slot
+
+    def positions(self, slots, ages):
+        """ the tiles that the particles in slots are on at the given ages """
+        ages = minimum(ages, self.lifetimes[slots])
+        #the small nudge keeps float error from landing a step short:
+        steps = floor(ages / self.speeds[slots] + 1e-6).astype(int32)
+        steps = minimum(steps, self.paths.shape[1] - 1)
+        return self.paths[slots, steps]
+
+    def update(self, now=None):
+        """
+        moves every particle on to now, returns (coord, damage, source_actor)
+        for each tile holding actors that a damaging particle entered.
+
+        damaging particles are moved in substeps no longer than a tile so
+        that a fast one can't skip over an actor between frames.
+        """
+        if now == None:
+            now = perf_counter()
+        elapsed, self.last_update = now - self.last_update, now
+        live = flatnonzero(self.alive)
+        if not live.size:
+            self.tile_slots = {}
+            return []
+        entered = []
+        damaging = live[self.damages[live] > 0]
+        if damaging.size:
+            fastest = 1 / self.speeds[damaging].min()
+            substeps = max(1, ceil(fastest * elapsed))
+            for substep in range(1, substeps + 1):
+                ages = self.ages[damaging] + elapsed * substep / substeps
+                tiles = self.positions(damaging, ages)
+                moved = (tiles != self.tiles[damaging]).any(axis=1)
+                for slot, tile in zip(damaging[moved], tiles[moved]):
+                    entered.append((tuple(tile.tolist()), slot))
+                self.tiles[damaging[moved]] = tiles[moved]
+        hits = self.hits(entered)
+        self.ages[live] += elapsed
+        self.tiles[live] = self.positions(live, self.ages[live])
+        finished = self.ages[live] >= self.lifetimes[live]
+        for slot in live[finished].tolist():
+            self.expire(slot)
+        still_live = live[~finished]
+        self.tile_slots = dict(zip(
+            map(tuple, self.tiles[still_live].tolist()), still_live.tolist()
+        ))
+        return hits
+
+    def hits(self, entered):
+        """ which of the entered tiles hold actors, found with actor_index """
+        if not entered:
+            return []
+        xs, ys = zip(*(coord for coord, _ in entered))
+        occupied = {
+            coord for _, coord 
+            in actor_index.in_rect((min(xs), min(ys)), (max(xs), max(ys)))
+        }
+        return [
+            (coord, int(self.damages[slot]), self.sources[slot])
+            for coord, slot in entered if coord in occupied
+        ]
+
+    def expire(self, slot):
+        palette = self.palettes[slot]
+        if palette != -1 and random() > .8:
+            coord = tuple(self.tiles[slot].tolist())
+            map_dict[coord].tile = choice(self.debris_palettes[palette])
+            map_dict[coord].description = "Debris."
+        self.alive[slot] = False
+        self.sources[slot] = None
+        self.descriptions[slot] = None
+        self.free_slots.append(slot)
+        self.live_count -= 1
+
+    def get_cell(self, coord):
+        """ the (glyph, fg, bg) cell of the particle on coord """
+        slot = self.tile_slots[coord]
+        return self.animations[self.presets[slot]].get_cell(coord)
+
+    def description_at(self, coord):
+        """ what examining the particle on coord shows """
+        return self.descriptions[self.tile_slots[coord]]
 
 class Item:
     """
@@ -499,6 +1011,14 @@ class Item:
         can be used (via its usable_power and given power_kwargs (for different
                 versions of the same item)
     """
+    __slots__ = (
+        'name', 'item_id', 'spawn_coord', 'current_location', 'uses', 'tile',
+        'usable_power', 'description', 'use_message', 'usage_tip', 'broken',
+        'broken_text', 'power_kwargs', 'mutable', 'breakable',
+        'accepts_charges', 'stackable', 'quantity', 'custom_icon', 'cooldown',
+        'last_use_time',
+    )
+
     def __init__(
         self,
         name='generic_item',
@@ -1103,18 +1623,597 @@ def brightness_test(print_coord=(110, 32)):
         output.append(term.color(i)('{0:0{1}X}█'.format(i, 2)))
         if i % 16 == 0 and i != 0:
             offset_coord = add_coords(print_coord, (0, i // 16))
-            with term.location(*offset_coord):
-                print(''.join(output))
+            screen_print(coord=offset_coord, text=''.join(output))
             output = []
 
+class Terminal_backend:
+    """
+    the shared part of the backends that write escape sequences to stdout.
+
+    subclasses fill in fg_seqs and bg_seqs (color number -> sequence, -1
+    meaning the terminal's default) and normal_seq, and provide move_seq,
+    write, clear and session.
+    """
+    def draw_cells(self, cells):
+        """
+        draws sorted ((x, y), (glyph, fg, bg)) pairs, only moving the cursor
+        where a run of adjacent cells is broken and only changing colors
+        between cells that differ.
+        """
+        output = []
+        last_coord = None
+        current_colors = (-1, -1)
+        for (x, y), (glyph, fg, bg) in cells:
+            if last_coord != (x - 1, y):
+                output.append(self.move_seq(x, y))
+            if (fg, bg) != current_colors:
+                output.append(self.normal_seq)
+                output.append(self.fg_seqs.get(fg, ''))
+                output.append(self.bg_seqs.get(bg, ''))
+                current_colors = (fg, bg)
+            output.append(glyph)
+            last_coord = (x, y)
+        output.append(self.normal_seq)
+        self.write(''.join(output))
+
+class Blessed_backend(Terminal_backend):
+    """ draws through the blessed terminal, term. """
+    def __init__(self):
+        self.normal_seq = term.normal
+        self.fg_seqs = {-1:''}
+        self.bg_seqs = {-1:''}
+        for color_num in range(256):
+            self.fg_seqs[color_num] = str(term.color(color_num))
+            self.bg_seqs[color_num] = str(term.on_color(color_num))
+
+    def move_seq(self, x, y):
+        return term.move_xy(x, y)
+
+    def write(self, text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def clear(self):
+        # check and make call for specific operating system
+        _ = call('clear' if os.name =='posix' else 'cls')
+
+    def session(self):
+        return term.hidden_cursor()
+
+class Ansi_backend(Terminal_backend):
+    """
+    writes plain 256 color ANSI sequences as one encoded write per frame,
+    without going through blessed or the text layer of stdout.
+    """
+    def __init__(self, stream=None):
+        if stream == None:
+            stream = sys.stdout.buffer
+        self.stream = stream
+        self.normal_seq = '\x1b[0m'
+        self.fg_seqs = {-1:''}
+        self.bg_seqs = {-1:''}
+        for color_num in range(256):
+            self.fg_seqs[color_num] = f'\x1b[38;5;{color_num}m'
+            self.bg_seqs[color_num] = f'\x1b[48;5;{color_num}m'
+
+    def move_seq(self, x, y):
+        return f'\x1b[{y + 1};{x + 1}H'
+
+    def write(self, text):
+        #anything printed through sys.stdout has to land first:
+        sys.stdout.flush()
+        self.stream.write(text.encode())
+        self.stream.flush()
+
+    def clear(self):
+        self.write('\x1b[H\x1b[2J\x1b[3J')
+
+    @contextmanager
+    def session(self):
+        self.write('\x1b[?25l')
+        try:
+            yield
+        finally:
+            self.write('\x1b[?25h')
+
+class Headless_backend:
+    """
+    renders into an in-memory grid of cells instead of a terminal, for
+    running the game without one (profiling, checking what was drawn).
+
+    with keep_cells=False drawn cells are only counted.
+    """
+    def __init__(self, keep_cells=True):
+        self.keep_cells = keep_cells
+        self.cells = {}
+        self.frames_drawn = 0
+        self.cells_drawn = 0
+
+    def draw_cells(self, cells):
+        self.frames_drawn += 1
+        if self.keep_cells:
+            for coord, cell in cells:
+                self.cells[coord] = cell
+                self.cells_drawn += 1
+        else:
+            self.cells_drawn += len(cells)
+
+    def clear(self):
+        self.cells = {}
+
+    def session(self):
+        return nullcontext()
+
+    def get_cell(self, coord=(0, 0)):
+        return self.cells.get(coord, (' ', -1, -1))
+
+    def frame_text(self, top_left=(0, 0), bottom_right=(80, 24)):
+        """ the glyphs drawn in a rectangle of the screen, one line per row """
+        rows = []
+        for y in range(top_left[1], bottom_right[1]):
+            rows.append(''.join(
+                self.get_cell((x, y))[0]
+                for x in range(top_left[0], bottom_right[0])
+            ))
+        return '\n'.join(rows)
+
+class Screen_buffer:
+    """
+    a back buffer of what should be on screen and a front buffer of what was
+    last written to the terminal, both keyed by (x, y) screen coordinate.
+
+    cells are (glyph, fg, bg) tuples where fg and bg are color numbers, -1
+    meaning the terminal's default color. escape sequences are only made
+    in flush(), from a palette built once.
+
+    producers write into the back buffer (see screen_print) and flush()
+    sends only the cells that differ from the front buffer to the render
+    backend, in one batch.
+    """
+    def __init__(self, backend=None):
+        if backend == None:
+            backend = Blessed_backend()
+        self.backend = backend
+        self.back = {}
+        self.front = {}
+        self.dirty = set()
+        self.cells_written = 0
+        self.split_cache = {}
+        #text is formatted with term, so it's parsed with term's sequences:
+        self.fg_lookup = {}
+        self.bg_lookup = {}
+        for color_num in range(256):
+            fg_seq = str(term.color(color_num))
+            bg_seq = str(term.on_color(color_num))
+            #prefer the lowest color number for sequences that repeat:
+            if fg_seq and fg_seq not in self.fg_lookup:
+                self.fg_lookup[fg_seq] = color_num
+            if bg_seq and bg_seq not in self.bg_lookup:
+                self.bg_lookup[bg_seq] = color_num
+        self.reset_seqs = set(term.split_seqs(term.normal))
+
+    def write(self, coord=(0, 0), text=''):
+        text = str(text)
+        if len(text) == 1:
+            self.set_cell(coord, (text, -1, -1))
+            return
+        for offset, cell in self.get_cells(text):
+            self.set_cell(add_coords(coord, offset), cell)
+
+    def get_cells(self, text=''):
+        if text not in self.split_cache:
+            if len(self.split_cache) > 4096:
+                self.split_cache = {}
+            self.split_cache[text] = self.split_into_cells(text)
+        return self.split_cache[text]
+
+    def split_into_cells(self, text=''):
+        """
+        splits formatted text into (offset, cell) pairs of single characters,
+        each cell takes the colors that were active when it was written.
+        formatting other than color is dropped.
+        """
+        x, y = 0, 0
+        fg, bg = -1, -1
+        cells = []
+        for segment in term.split_seqs(text):
+            if segment == '\n':
+                x, y = 0, y + 1
+            elif segment in self.reset_seqs:
+                fg, bg = -1, -1
+            elif segment in self.fg_lookup:
+                fg = self.fg_lookup[segment]
+            elif segment in self.bg_lookup:
+                bg = self.bg_lookup[segment]
+            elif segment[0] != '\x1b':
+                cells.append(((x, y), (segment, fg, bg)))
+                x += 1
+        return cells
+
+    def set_cell(self, coord=(0, 0), cell=(' ', -1, -1)):
+        #a blank without a background looks the same whatever its fg:
+        if cell[0] == ' ' and cell[2] == -1:
+            cell = (' ', -1, -1)
+        if self.back.get(coord) != cell:
+            self.back[coord] = cell
+            self.dirty.add(coord)
+
+    def flush(self):
+        """
+        hands the changed cells to the backend left to right, top to bottom.
+        """
+        changed = sorted(
+            (y, x) for x, y in self.dirty
+            if self.front.get((x, y)) != self.back[x, y]
+        )
+        self.dirty = set()
+        if not changed:
+            return
+        cells = []
+        for y, x in changed:
+            cell = self.back[x, y]
+            self.front[x, y] = cell
+            cells.append(((x, y), cell))
+        self.cells_written += len(cells)
+        self.backend.draw_cells(cells)
+
+    def invalidate(self):
+        """ forget what's on the terminal so the next flush redraws it all """
+        self.front = {}
+        self.dirty = set(self.back)
+
+class Entity_registry:
+    """
+    hands out the integer handles that ids from generate_id are made from.
+
+    a handle packs a slot index (the low index_bits bits) together with the
+    slot's generation. freeing a slot moves its generation on, so a handle
+    to something that's gone never matches whatever reuses the slot.
+    """
+    def __init__(self, index_bits=24):
+        self.index_bits = index_bits
+        self.index_mask = (1 << index_bits) - 1
+        self.generations = []
+        self.base_names = []
+        self.free_slots = []
+        self.live_count = 0
+
+    def alloc(self, base_name=''):
+        if self.free_slots:
+            index = self.free_slots.pop()
+            self.base_names[index] = base_name
+        else:
+            index = len(self.generations)
+            self.generations.append(0)
+            self.base_names.append(base_name)
+        self.live_count += 1
+        return self.generations[index] << self.index_bits | index
+
+    def is_live(self, handle):
+        index = handle & self.index_mask
+        return (
+            index < len(self.generations) 
+            and self.generations[index] == handle >> self.index_bits
+        )
+
+    def free(self, handle):
+        if not self.is_live(handle):
+            return False
+        index = handle & self.index_mask
+        self.generations[index] += 1
+        self.base_names[index] = None
+        self.free_slots.append(index)
+        self.live_count -= 1
+        return True
+
+    def base_name(self, handle):
+        if not self.is_live(handle):
+            return None
+        return self.base_names[handle & self.index_mask]
+
+    def label(self, handle):
+        """ a readable name for logs, only made when asked for """
+        index, generation = handle & self.index_mask, handle >> self.index_bits
+        return f'{self.base_names[index]} (slot {index}, generation {generation})'
+
+class Actor_scheduler:
+    """
+    runs the turns of every basic_actor from one coroutine (see run).
+
+    actors wait in a heap keyed by the time of their next turn. each tick,
+    every actor that is due takes its turn in one batch and is pushed back
+    speed seconds later.
+
+    actors further than activity_radius from the player are dormant, they
+    skip their turns and are only looked at again every dormant_delay.
+    """
+    def __init__(self, tick_length=.05, activity_radius=30, dormant_delay=1):
+        self.tick_length = tick_length
+        self.activity_radius = activity_radius
+        self.dormant_delay = dormant_delay
+        self.queue = []
+        self.behaviors = {}
+        self.sequence = 0
+        self.turns_taken = 0
+        self.ticks = 0
+
+    def add(self, name_key, speed=1, movement_function=None,
+            movement_function_kwargs={}, start_time=None):
+        if start_time == None:
+            start_time = perf_counter()
+        self.behaviors[name_key] = (
+            speed, movement_function, movement_function_kwargs
+        )
+        self.push(name_key, start_time + speed)
+
+    def push(self, name_key, turn_time):
+        #the sequence number keeps actors due at the same time in order:
+        heapq.heappush(self.queue, (turn_time, self.sequence, name_key))
+        self.sequence += 1
+
+    def remove(self, name_key):
+        """ the actor's entry is dropped when it next comes up """
+        self.behaviors.pop(name_key, None)
+        forget_activity(name_key)
+
+    async def run_due(self, now=None):
+        """ takes the turn of every actor due at or before now """
+        if now == None:
+            now = perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            turn_time, _, name_key = heapq.heappop(self.queue)
+            if name_key not in self.behaviors:
+                continue
+            speed, movement_function, movement_function_kwargs = (
+                self.behaviors[name_key]
+            )
+            actor = actor_dict.get(name_key)
+            if isinstance(actor, Actor) and is_dormant(
+                coord=actor.coords(),
+                name=name_key,
+                activity_radius=self.activity_radius,
+            ):
+                self.push(name_key, now + self.dormant_delay)
+                continue
+            self.turns_taken += 1
+            keep_going = await actor_turn(
+                name_key=name_key,
+                movement_function=movement_function,
+                movement_function_kwargs=movement_function_kwargs,
+            )
+            if not keep_going:
+                self.remove(name_key)
+                continue
+            #an actor that fell more than a turn behind starts over from now:
+            self.push(name_key, max(turn_time + speed, now))
+
+    async def run(self):
+        while True:
+            if state_dict['killall'] == True:
+                break
+            await self.run_due()
+            self.ticks += 1
+            await asyncio.sleep(self.tick_length)
+
+class Timeline:
+    """
+    plays the keyframed text effects (fade_print, filter_print,
+    filter_into_log, directional_alert, damage_numbers) from the frame loop,
+    rather than from tasks that sleep between every character.
+
+    a tween is a list of (delay, function, kwargs) keyframes, delay being
+    seconds after the tween was added. advance (called once per frame by
+    view_frame_loop) calls every keyframe that has come due, in order.
+
+    a keyframe that raises is reported and the rest of its tween dropped,
+    so one broken effect can't stop the others (or the frame loop).
+    """
+    def __init__(self):
+        self.queue = []
+        self.sequence = 0
+        self.tween_number = 0
+        self.keyframes_left = {}
+        self.finished = {}
+
+    def add(self, keyframes, start_time=None):
+        """ queues a tween, returns its number """
+        if start_time == None:
+            start_time = perf_counter()
+        self.tween_number += 1
+        self.keyframes_left[self.tween_number] = len(keyframes)
+        for delay, function, kwargs in keyframes:
+            heapq.heappush(
+                self.queue,
+                (start_time + delay, self.sequence, self.tween_number, function, kwargs)
+            )
+            self.sequence += 1
+        if not keyframes:
+            self.end_tween(self.tween_number)
+        return self.tween_number
+
+    async def play(self, keyframes):
+        """ queues a tween and waits for its last keyframe """
+        tween_number = self.add(keyframes)
+        if tween_number not in self.keyframes_left:
+            return
+        self.finished[tween_number] = asyncio.get_event_loop().create_future()
+        await self.finished[tween_number]
+
+    def advance(self, now=None):
+        if now == None:
+            now = perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            _, _, tween_number, function, kwargs = heapq.heappop(self.queue)
+            try:
+                function(**kwargs)
+            except Exception as error:
+                report_error('a keyframe failed, dropping its tween', error)
+                self.drop_tween(tween_number)
+                continue
+            self.keyframes_left[tween_number] -= 1
+            if self.keyframes_left[tween_number] == 0:
+                self.end_tween(tween_number)
+
+    def drop_tween(self, tween_number):
+        """ removes the keyframes a tween has left and ends it """
+        self.queue = [entry for entry in self.queue if entry[2] != tween_number]
+        heapq.heapify(self.queue)
+        self.end_tween(tween_number)
+
+    def stop(self):
+        """ drops every tween, cancelling whatever is waiting in play """
+        for finished in self.finished.values():
+            finished.cancel()
+        self.__init__()
+
+    def end_tween(self, tween_number):
+        self.keyframes_left.pop(tween_number, None)
+        finished = self.finished.pop(tween_number, None)
+        if finished != None and not finished.done():
+            finished.set_result(True)
+
+    def active_count(self):
+        return len(self.keyframes_left)
+
 #Global state setup-------------------------------------------------------------
+def report_error(message, error):
+    """
+    hands an error caught inside a shared loop to the event loop's exception
+    handler, the same place an effect's own failing task would end up.
+    """
+    asyncio.get_event_loop().call_exception_handler(
+        {'message':message, 'exception':error}
+    )
+
+def map_changed():
+    """
+    called whenever something that blocks sight is added, removed or moved.
+    cached views of the map (see get_visible_coords) compare against this.
+    """
+    state_dict['map version'] += 1
+
+def terrain_changed():
+    """
+    called whenever a tile becomes passable or impassable. cached flow
+    fields (see get_flow_field) compare against this.
+    """
+    state_dict['terrain version'] += 1
+
+#words in actor names that behaviour is keyed on, each gets a bit in the
+#tags of the actors whose names contain it:
+name_tag_words = (
+    'mte', 'player', 'box', 'weight', 'crate', 'static', 'zombie', 'leech',
+    'blob', 'sword', 'particle', 'vine', 'shroud',
+)
+tag_bits = {word:1 << number for number, word in enumerate(name_tag_words)}
+#and bits for what an actor is made as:
+tag_bits['blocking actor'] = 1 << len(name_tag_words)
+tag_bits['solid actor'] = 1 << len(name_tag_words) + 1
+tag_bits['multi tile actor'] = 1 << len(name_tag_words) + 2
+
+def actor_tags(name='', blocking=False, solid=False, multi_tile=False):
+    """ the tag bits of an actor, worked out once when it's made """
+    tags = 0
+    for word in name_tag_words:
+        if word in name:
+            tags |= tag_bits[word]
+    if blocking:
+        tags |= tag_bits['blocking actor']
+    if solid:
+        tags |= tag_bits['solid actor']
+    if multi_tile:
+        tags |= tag_bits['multi tile actor']
+    return tags
+
+def count_occupant(coord=(0, 0), tags=0, change=1):
+    """
+    adds change to the solid and blocking counts of coord for each of those
+    in an actor's tags.
+    """
+    if tags & tag_bits['solid actor']:
+        map_dict.add_to_field(coord, 'solid_count', change)
+    if tags & tag_bits['blocking actor']:
+        map_dict.add_to_field(coord, 'blocking_count', change)
+
+def check_occupancy():
+    """
+    recounts the actors on every tile and compares them against the
+    solid and blocking counts, the tag summaries and actor_index.
+
+    returns a list of the problems found, empty when they all agree.
+    """
+    problems = []
+    indexed_names = {}
+    for coord in map_dict.materialized_coords():
+        actors = map_dict[coord].actors
+        solid_count, blocking_count, tags = 0, 0, 0
+        for name_key in actors:
+            indexed_names[name_key] = coord
+            actor_tags = getattr(actor_dict.get(name_key), 'tags', 0)
+            tags |= actor_tags
+            solid_count += bool(actor_tags & tag_bits['solid actor'])
+            blocking_count += bool(actor_tags & tag_bits['blocking actor'])
+        if map_dict[coord].solid_count != solid_count:
+            problems.append(
+                f'{coord}: solid_count is {map_dict[coord].solid_count}, '
+                f'counted {solid_count}'
+            )
+        if map_dict[coord].blocking_count != blocking_count:
+            problems.append(
+                f'{coord}: blocking_count is {map_dict[coord].blocking_count}, '
+                f'counted {blocking_count}'
+            )
+        if actors.tags != tags:
+            problems.append(f'{coord}: tags are {actors.tags}, counted {tags}')
+    for name_key, coord in indexed_names.items():
+        if actor_index.locations.get(name_key) != coord:
+            problems.append(
+                f'{name_key}: indexed at {actor_index.locations.get(name_key)}, '
+                f'found at {coord}'
+            )
+    return problems
+
+@lru_cache(maxsize=None)
+def name_tag_mask(words=()):
+    """
+    the tag bits for a tuple of name words, or None if any of them isn't
+    one of name_tag_words (and so has to be matched against names).
+    """
+    mask = 0
+    for word in words:
+        if word not in name_tag_words:
+            return None
+        mask |= tag_bits[word]
+    return mask
+
 term = Terminal()
-map_dict = defaultdict(lambda: Map_tile(passable=False, blocking=True))
+map_dict = Map_dict()
 mte_dict = {}
 room_centers = set()
 actor_dict = defaultdict(lambda: [None])
 state_dict = defaultdict(lambda: None)
 item_dict = defaultdict(lambda: None)
+screen = Screen_buffer()
+actor_index = Spatial_index(
+    kind_of=lambda name: getattr(actor_dict.get(name), 'base_name', None)
+)
+item_index = Spatial_index(
+    kind_of=lambda name: getattr(item_dict.get(name), 'name', None)
+)
+spatial_indexes = {'actors':actor_index, 'items':item_index}
+actor_scheduler = Actor_scheduler()
+particle_pool = Particle_pool()
+timeline = Timeline()
+#item id -> the thrown_action task waiting on its fuse:
+lit_fuses = {}
+#coord -> (whether the tile was seen before, {key:cell}), see damage_numbers:
+text_overlay = {}
+entity_registry = Entity_registry()
+render_backends = {
+    'blessed':Blessed_backend,
+    'ansi':Ansi_backend,
+    'headless':Headless_backend,
+}
 actor_dict['player'] = Actor(
     coord=(2, 2), 
     name='player', 
@@ -1129,23 +2228,227 @@ actor_dict['player'] = Actor(
     )),
 )
 
+#greyscale ramp from brightest (0xfe) to darkest (0xe8):
+brightness_vals = tuple((i, '█') for i in range(0xe8, 0xff))[::-1]
+#(distance bucket, brightness_mod bucket, constant) -> possible brightnesses
+brightness_lut = {}
+#indexes into the brightness_lut entries, stands in for random() per cell:
+dither_source = cycle([randint(0, 3) for _ in range(997)])
+#stand in for random() and a random walk in compile_animation's tables:
+animation_noise = tuple(randint(0, 0xffff) for _ in range(1021))
+animation_walk = tuple(accumulate(randint(-1, 1) for _ in range(1021)))
+
 def get_brightness_val(index, get_length=False):
-    low_val, high_val = 0xe8, 0xff
-    index_max = high_val - low_val
-    brightness_vals = [(i, '█') for i in range(0xe8, 0xff)][::-1]
     if get_length:
         return len(brightness_vals)
-    if index >= index_max:
+    if index >= 0xff - 0xe8:
         return brightness_vals[-1]
     else:
         return brightness_vals[index]
 
 #Drawing functions--------------------------------------------------------------
-def paint_preset(tile_coords=(0, 0), preset='floor'):
+@lru_cache(maxsize=None)
+def get_animation_presets(base_tile='o'):
     """
-    Applies a preset to an existing map tile.
+    the Animation presets, base_tile only matters to the ones that animate
+    around an existing glyph ('pulse' and 'shimmer').
+    """
+    presets = {
+        'bars':{
+            'animation':(' ▁▂▃▄▅▆▇█'), 
+            'behavior':'walk both', 
+            'color_choices':'2'
+        },
+        'blob':{
+            'animation':('ööööÖ'),
+            'behavior':'loop tile',
+            'color_choices':('2')
+        },
+        'zombie':{
+            'animation':('ŻŻż'),
+            'behavior':'random',
+            'color_choices':(0xa7, 0xa8, 0xa9)
+        },
+        'leech':{
+            'animation':('⟆⟅'),
+            'behavior':'random',
+            'color_choices':(0x16, 0x22, 0x1c)
+        },
+        'critter':{
+            'animation':('.'),
+            'behavior':'random',
+            'color_choices':(0xac, 0xa6, 0xca)
+        },
+        'presence':{
+            'animation':('●'),
+            'behavior':'random',
+            #'color_choices':list(range(0xe8, 0xff))
+            'color_choices':list(range(0xf7, 0xff))
+        },
+        'bullet':{
+            'animation':('◦◦◦○'),
+            'behavior':'random',
+            'color_choices':'446'
+        },
+        'blank':{
+            'animation':' ', 
+            'behavior':'random', 
+            'color_choices':'0'
+        },
+        'door':{
+            'animation':('▯'), 
+            'behavior':'random', 
+            'color_choices':'78888'
+        },
+        'energy block':{
+            'animation':'▤▥▦▧▨▩', 
+            'behavior':'random', 
+            'color_choices':'456'
+        },
+        'explosion':{
+            'animation':('█▓▒'), 
+            'behavior':'random', 
+            'color_choices':'111333',
+            'background':'0111333'
+        },
+        'steam':{
+            'animation':('▖▘▙▚▛▜▝▞▟'), 
+            'behavior':'random', 
+            'color_choices':
+                [i for i in list(range(0xf2, 0xfe))],
+            'background':
+                [i for i in list(range(0xf2, 0xfe))],
+        },
+        'fire':{
+            'animation':'^∧', 
+            'behavior':'random', 
+            'color_choices':'3331'
+        },
+        'pulse':{
+            'animation':(base_tile), 
+            'behavior':'loop both',
+            'color_choices':
+                [i for i in list(range(0xe8, 0xff, 2)) 
+                          + list(range(0xff, 0xe8, -2))],
+        },
+        'goo':{
+            'animation':('▒'), 
+            'behavior':'random',
+            'color_choices':(0x35, 0x36, 0x37, 0x38, 0x39),
+        },
+        'grass':{
+            'animation':('▒'), 
+            'behavior':'random',
+            'color_choices':(0x4c, 0x4c, 0x4c, 0x70),
+        },
+        'terminal':{
+            'animation':('▤▥▦▧▨▩'), 
+            'behavior':'random',
+            #'color_choices':(0x1c, 0x2e, 0x2e, 0x2e),
+            'color_choices':(0x4c, 0x4c, 0x4c, 0x70),
+        },
+        'loop test':{
+            'animation':('0123456789abcdefghi'), 
+            'behavior':'loop both', 
+            'color_choices':'33333344444'
+        },
+        'mouth':{
+            'animation':('✳✳✳✳✳✸✸'),
+            'behavior':'loop tile',
+            'color_choices':('456')
+        },
+        'nightmare':{
+            'animation':('      ▒▓▒ ▒▓▒'), 
+            'behavior':'random',
+            'color_choices':(0x34, 0x58),
+        },
+        'noise':{
+            'animation':('      ▒▓▒ ▒▓▒'), 
+            'behavior':'loop tile', 
+            'color_choices':(0xe9, 0xea),
+        },
+        'sparse noise':{
+            'animation':(' ' * 100 + '█▓▒'), 
+            'behavior':'random', 
+            'color_choices':'1' * 5 + '7'
+        },
+        'shimmer':{
+            'animation':(base_tile, base_tile), 
+            'behavior':'random', 
+            'color_choices':(0x0e, 0x19, 0x1f, 0x9f),
+        },
+        'spikes':{
+            'animation':('∧∧∧∧‸‸‸     '), 
+            'behavior':'loop both', 
+            'color_choices':'7'
+        },
+        #TODO: a use action that washes hands/fills bottles by default on water tile
+        #TODO: a bottle that can be poured on other elements.
+        'water':{
+            'animation':'███▒▒▒▓▓▓▒▒▒',
+            'behavior':'loop tile',
+            'color_choices':([0x11 for i in range(50)] + list(range(0x11, 0x15))),
+        },
+        'writhe':{
+            'animation':('╭╮╯╰╭╮╯╰'),
+            'behavior':'random',
+            'color_choices':'456'
+        }
+    }
+    return MappingProxyType(presets)
+
+@lru_cache(maxsize=None)
+def compile_animation(animation, behavior, color_choices, background=None):
+    """
+    builds the frame tables an Animation looks its cells up in, one each for
+    the glyph, fg and bg. every table is read one entry per frame, starting
+    from a point picked by the cell's coord.
+
+    looped channels are the choices themselves, so neighbouring cells run
+    through the same loop out of step. random and walked channels are long
+    tables made from animation_noise or animation_walk.
+    """
+    tile_mode, color_mode = {
+        'random':('random', 'random'),
+        'loop color':('random', 'loop'),
+        'loop tile':('loop', 'random'),
+        'loop both':('loop', 'loop'),
+        'walk color':('random', 'walk'),
+        'walk frame':('walk', 'random'),
+        'walk both':('walk', 'walk'),
+    }[behavior]
+    if background:
+        backgrounds = tuple(int(color) for color in background)
+    else:
+        backgrounds = (0xe8,) #background color.
+    colors = tuple(int(color) for color in color_choices)
+
+    def channel(choices, mode, offset=0):
+        if mode == 'loop':
+            return choices
+        elif mode == 'walk':
+            source = animation_walk
+        else:
+            source = animation_noise[offset:] + animation_noise[:offset]
+        return tuple(choices[step % len(choices)] for step in source)
 
-    Each attribute is individually set so that actors and items are preserved.
+    return (
+        channel(animation, tile_mode),
+        channel(colors, color_mode, offset=340),
+        channel(backgrounds, 'random', offset=680),
+    )
+
+@lru_cache(maxsize=None)
+def get_tile_presets():
+    """
+    builds the presets used by paint_preset once and returns them as a
+    read-only mapping of preset name to the (field, value) pairs to write.
+
+    animated presets only record is_animated, paint_preset gives the tile
+    its Animation.
+
+    every tile painted with a preset shares its use_action_kwargs, so they
+    are stored read-only. assign a new dict to a tile to change its kwargs.
     """
     presets = {
         'floor':Map_tile(
@@ -1176,8 +2479,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=True,
             description='A shimmering insubstantial surface.',
             magic=False,
-            is_animated=True, 
-            animation=Animation(preset='noise')
+            is_animated=True
         ),
         'chasm_inner':Map_tile(
             tile='█',
@@ -1225,8 +2527,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             color_num=0x34,
             description='The ever shifting pattern hurts to look at.',
             magic=False,
-            is_animated=True,
-            animation=Animation(preset='nightmare')
+            is_animated=True
         ),
         'pulse':Map_tile(
             tile='o',
@@ -1234,8 +2535,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=True,
             description='',
             magic=False,
-            is_animated=True,
-            animation=Animation(preset='pulse')
+            is_animated=True
         ),
         'goo':Map_tile(
             tile='.',
@@ -1243,8 +2543,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=True,
             description='A shimmering and roiling purple goo.',
             magic=False,
-            is_animated=True,
-            animation=Animation(preset='goo')
+            is_animated=True
         ),
         'grass':Map_tile(
             tile='▒',
@@ -1252,8 +2551,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=True,
             description='Soft knee-high grass. It nods gently in an unfelt breeze.',
             magic=False,
-            is_animated=True, 
-            animation=Animation(preset='grass'),
+            is_animated=True,
             use_action_func=append_to_log,
             use_action_kwargs={
                 'message':'You reach down and run your hands through the tall grass.'
@@ -1267,8 +2565,7 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=True,
             description='A shallow pool of water.',
             magic=False,
-            is_animated=True, 
-            animation=Animation(preset='water'),
+            is_animated=True,
             prevent_pushing=True,
             use_action_func=use_action_preset,
             use_action_kwargs={
@@ -1289,27 +2586,46 @@ def paint_preset(tile_coords=(0, 0), preset='floor'):
             passable=False,
             description='A flickering monitor with a curved glass surface.',
             magic=False,
-            is_animated=True,
-            animation=Animation(preset='terminal')
+            is_animated=True
         ),
     }
-    map_dict[tile_coords].passable = presets[preset].passable
-    map_dict[tile_coords].tile = presets[preset].tile
-    map_dict[tile_coords].blocking = presets[preset].blocking 
-    map_dict[tile_coords].description = presets[preset].description
-    if presets[preset].color_num:
-        map_dict[tile_coords].color_num = presets[preset].color_num
-    if presets[preset].use_action_func:
-        map_dict[tile_coords].use_action_func = presets[preset].use_action_func
-        map_dict[tile_coords].use_action_kwargs = presets[preset].use_action_kwargs
-    if presets[preset].brightness_mod:
-        rand_offset = rand_float(*presets[preset].brightness_mod)
+    compiled_presets = {}
+    for preset_name, preset in presets.items():
+        fields = [
+            ('passable', preset.passable),
+            ('tile', preset.tile),
+            ('blocking', preset.blocking),
+            ('description', preset.description),
+        ]
+        if preset.color_num:
+            fields.append(('color_num', preset.color_num))
+        if preset.use_action_func:
+            fields.append(('use_action_func', preset.use_action_func))
+            fields.append(
+                ('use_action_kwargs', MappingProxyType(preset.use_action_kwargs))
+            )
+        fields.append(('is_animated', preset.is_animated))
+        compiled_presets[preset_name] = (tuple(fields), preset.brightness_mod)
+    return MappingProxyType(compiled_presets)
+
+def paint_preset(tile_coords=(0, 0), preset='floor'):
+    """
+    Applies a preset to an existing map tile.
+
+    Each attribute is individually set so that actors and items are preserved.
+    """
+    fields, brightness_mod = get_tile_presets()[preset]
+    map_dict.set_fields(tile_coords, fields)
+    if brightness_mod:
+        rand_offset = rand_float(*brightness_mod)
         map_dict[tile_coords].brightness_mod += rand_offset
-    if presets[preset].is_animated:
-        map_dict[tile_coords].is_animated = presets[preset].is_animated
-        map_dict[tile_coords].animation = Animation(preset=preset)
-    else:
-        map_dict[tile_coords].is_animated = False
+    if map_dict[tile_coords].is_animated:
+        map_dict[tile_coords].animation = preset_animation(preset)
+
+@lru_cache(maxsize=None)
+def preset_animation(preset):
+    """ Animations keep no state, so tiles painted with a preset share one """
+    return Animation(preset=preset)
 
 def rand_float(min_val, max_val, round_places=2):
     return round((random() * (max_val - min_val)) + min_val, round_places)
@@ -1824,25 +3140,26 @@ def draw_circle(
 ):
     """
     draws a filled circle onto map_dict.
+
+    with an annulus_radius, only the ring outside of it is filled. the
+    border is everything within border_thickness of the circle that wasn't
+    filled, the hole in the middle of a ring included.
     """
-    x_bounds = center_coord[0] - radius, center_coord[0] + radius
-    y_bounds = center_coord[1] - radius, center_coord[1] + radius
-    points = get_circle(center=center_coord, radius=radius)
     if annulus_radius:
-        annulus_points = get_circle(center=center_coord, radius=annulus_radius)
-        points = list(set(points) - set(annulus_points))
-    for point in points:
+        points = circle_offsets(radius, inner_radius=annulus_radius)
+    else:
+        points = circle_offsets(radius)
+    for point in shape_at(points, center_coord):
         if not map_dict[point].mutable:
             continue
         if random() < chance_skip:
             continue
-        distance_to_center = point_to_point_distance(center_coord, point)
-        if distance_to_center <= radius:
-            paint_preset(tile_coords=point, preset=preset)
+        paint_preset(tile_coords=point, preset=preset)
     if border_thickness > 0:
-        radius = radius + border_thickness
-        boundary_circle = get_circle( radius=radius, center=center_coord)
-        for point in set(boundary_circle) - set(points):
+        border = circle_offsets(radius + border_thickness, inner_radius=radius)
+        if annulus_radius:
+            border = concatenate((border, circle_offsets(annulus_radius)))
+        for point in shape_at(border, center_coord):
             if random() < chance_skip:
                 continue
             paint_preset(tile_coords=point, preset=border_preset)
@@ -1978,28 +3295,36 @@ async def explosion_effect(
     destroys_terrain=True,
     inverse_square_damage=True,
 ):
-    await radial_fountain(
-        tile_anchor=center_coord,
-        anchor_actor='player', 
-        frequency=.001,
-        radius=(radius, radius + 3),
-        speed=(1, 2), 
-        collapse=False,
-        debris='`.,\'',
-        deathclock=particle_count,
-        animation=Animation(preset='explosion')
-    )
-    if destroys_terrain:
-        #TODO: fix so this doesn't "destroy" voids and things that don't make sense
-        area_of_effect = get_circle(center=center_coord, radius=radius)
-        draw_circle(center_coord=center_coord, radius=radius)
-    if damage:
-        await damage_within_circle(
-            center=center_coord, 
-            radius=radius, 
-            damage=damage,
-            inverse_square_damage=inverse_square_damage,
+    """
+    any explosives lying within the blast go off after it, one blast at a
+    time from a queue rather than by calling back into explosion_effect.
+    """
+    blasts = deque([(center_coord, radius, damage, particle_count)])
+    while blasts:
+        center_coord, radius, damage, particle_count = blasts.popleft()
+        await radial_fountain(
+            tile_anchor=center_coord,
+            anchor_actor='player', 
+            frequency=.001,
+            radius=(radius, radius + 3),
+            speed=(1, 2), 
+            collapse=False,
+            debris='`.,\'',
+            deathclock=particle_count,
+            animation_preset='explosion',
         )
+        if destroys_terrain:
+            #TODO: fix so this doesn't "destroy" voids and things that don't make sense
+            draw_circle(center_coord=center_coord, radius=radius)
+        if damage:
+            blasts.extend(
+                damage_within_circle(
+                    center=center_coord, 
+                    radius=radius, 
+                    damage=damage,
+                    inverse_square_damage=inverse_square_damage,
+                )
+            )
 
 async def thrown_action(
     thrown_item_id=None,
@@ -2022,23 +3347,26 @@ async def thrown_action(
         rand_drift=rand_drift
     )
     presets={
-        'dynamite':{
-            'called_function':explosion_effect,
-            'kwargs':{
-                'radius':6,
-                'damage':75,
-                'particle_count':25,
-            }
-        }
+        'dynamite':explosion_effect,
+    }
+    called_function = presets[action_preset]
+    function_kwargs = {
+        'radius':radius,
+        'damage':damage,
+        'particle_count':particle_count,
     }
-    called_function = presets[action_preset]['called_function']
-    function_kwargs = presets[action_preset]['kwargs']
     item_location = item_dict[thrown_item_id].current_location
     if fuse_length > 0:
-        await display_fuse(fuse_length=fuse_length, item_id=thrown_item_id)
+        #a blast nearby sets the item off early (see damage_within_circle):
+        lit_fuses[thrown_item_id] = asyncio.current_task()
+        try:
+            await display_fuse(fuse_length=fuse_length, item_id=thrown_item_id)
+        finally:
+            lit_fuses.pop(thrown_item_id, None)
     if single_use_item and thrown_item_id in map_dict[item_location].items:
         del map_dict[item_location].items[thrown_item_id]
         del item_dict[thrown_item_id]
+        release_id(thrown_item_id)
     await called_function(
         center_coord=item_location,
         **function_kwargs,
@@ -2066,18 +3394,64 @@ async def damage_all_actors_at_coord(
             )
         await damage_actor(actor=actor[0], damage=damage, display_above=True, ignore_list=ignore_list)
 
-async def damage_within_circle(
+def explosive_blast(item_id=None):
+    """
+    the (radius, damage, particle_count) an explosive item goes off with:
+    its power_kwargs, falling back on thrown_action's defaults.
+    """
+    power_kwargs = item_dict[item_id].power_kwargs
+    defaults = signature(thrown_action).parameters
+    return tuple(
+        power_kwargs.get(name, defaults[name].default)
+        for name in ('radius', 'damage', 'particle_count')
+    )
+
+def damage_within_circle(
     center=(0, 0), 
     radius=6, 
     damage=75,
     inverse_square_damage=False,
 ):
-    area_of_effect = get_circle(center=center, radius=radius)
-    for coord in area_of_effect:
-        dist_from_center = point_to_point_distance(center, coord)
-        if inverse_square_damage: 
-            damage = round(1 / (dist_from_center ** 2))
-        await damage_all_actors_at_coord(coord=coord, damage=damage)
+    """
+    damages every actor within radius of center (the tiles of get_circle)
+    in one pass: the actors are found with a single actor_index query and
+    their damage is worked out together. breaking up whatever was killed
+    is left to break_actor.
+
+    with inverse_square_damage, damage falls off with the square of the
+    distance from center (full damage within a tile of it).
+
+    explosives lying in the circle are taken off the map and returned as
+    (coord, radius, damage, particle_count) blasts for the caller to set
+    off. one that's already lit has its fuse (thrown_action) cancelled.
+    """
+    blasts = []
+    for item_id, coord in item_index.within_radius(center, radius):
+        if item_dict[item_id].usable_power != thrown_action:
+            continue
+        if item_id in lit_fuses:
+            lit_fuses.pop(item_id).cancel()
+        blasts.append((coord, *explosive_blast(item_id)))
+        del map_dict[coord].items[item_id]
+        del item_dict[item_id]
+        release_id(item_id)
+    found = actor_index.within_radius(center, radius)
+    if not found:
+        return blasts
+    names, coords = zip(*found)
+    if inverse_square_damage:
+        distances_squared = ((array(coords) - center) ** 2).sum(axis=1)
+        damages = rint(damage / maximum(distances_squared, 1)).astype(int)
+    else:
+        damages = full(len(names), damage)
+    broken = [
+        name for name, actor_damage in zip(names, damages.tolist())
+        if name in actor_dict and apply_damage(actor=name, damage=actor_damage)
+    ]
+    for name in broken:
+        if name in actor_dict:
+            break_actor(actor=name)
+    return blasts
 
 async def damage_actor(
     actor=None,
@@ -2088,42 +3462,74 @@ async def damage_actor(
     material='wood',
     ignore_list=None,
 ):
+    broken = apply_damage(
+        actor=actor,
+        damage=damage,
+        display_above=display_above,
+        ignore_list=ignore_list,
+    )
+    if broken:
+        if not leaves_body:
+            await spray_debris(
+                noun=actor_dict[actor].base_name, 
+                root_coord=actor_dict[actor].coords(), 
+                preset=actor_dict[actor].made_of,
+            )
+        kill_actor(name_key=actor, blood=blood, leaves_body=leaves_body)
+        #TODO: this probably does weird stuff for static actors??
+
+def apply_damage(actor=None, damage=10, display_above=True, ignore_list=None):
+    """
+    takes damage off of an actor's health. returns True when that leaves a
+    breakable actor (other than the player) with nothing left, for the
+    caller to break up.
+    """
     if ignore_list == None:
         ignore_list = []
     if not isinstance(actor_dict[actor], Actor):
-        return
+        return False
     if actor_dict[actor] == None:
-        return
+        return False
     if actor_dict[actor].breakable == False:
-        return
+        return False
     if hasattr(actor_dict[actor], 'health'):
         current_health = actor_dict[actor].health
     else:
-        return
+        return False
     if current_health - damage <= 0:
         actor_dict[actor].health = 0
     else:
         actor_dict[actor].health = current_health - damage
-    exclusions = ['sword', 'particle', 'vine', 'shroud']
-    for word in exclusions + ignore_list:
-        if word in actor and word in ignore_list:
-            actor_name = actor.split('_')[0]
-            message = f"Your attack has no effect on the {actor_name}!"
-            asyncio.ensure_future(append_to_log(message=message))
-            return
+    ignore_mask = name_tag_mask(tuple(ignore_list))
+    if ignore_mask != None:
+        ignored = actor_dict[actor].tags & ignore_mask
+    else:
+        ignored = any(word in actor for word in ignore_list)
+    if ignored:
+        actor_name = actor.split('_')[0]
+        message = f"Your attack has no effect on the {actor_name}!"
+        asyncio.ensure_future(append_to_log(message=message))
+        return False
     if display_above:
-        asyncio.ensure_future(damage_numbers(damage=damage, actor=actor))
+        damage_numbers(damage=damage, actor=actor)
     if actor_dict[actor].health <= 0 and actor != 'player':
-        if actor_dict[actor].breakable == True:
-            root_coord = actor_dict[actor].coords()
-            actor_noun = actor_dict[actor].base_name
-            actor_material = actor_dict[actor].made_of
-            if not leaves_body:
-                await spray_debris(
-                    noun=actor_noun, root_coord=root_coord, preset=actor_material
-                )
-            kill_actor(name_key=actor, blood=blood, leaves_body=leaves_body)
-            #TODO: this probably does weird stuff for static actors??
+        return actor_dict[actor].breakable == True
+    return False
+
+def break_actor(actor=None, leaves_body=False, blood=False):
+    """
+    removes an actor that apply_damage broke, leaving its debris to be
+    sprayed (and announced) by a separate task.
+    """
+    if not leaves_body:
+        asyncio.ensure_future(
+            spray_debris(
+                noun=actor_dict[actor].base_name, 
+                root_coord=actor_dict[actor].coords(), 
+                preset=actor_dict[actor].made_of,
+            )
+        )
+    kill_actor(name_key=actor, blood=blood, leaves_body=leaves_body)
 
 async def spray_debris(
     root_coord=(0, 0), 
@@ -2147,12 +3553,7 @@ async def spray_debris(
     }
     message, palette = debris_dict[preset]
     if announce_if_visible:
-        within_fov = check_point_within_arc(
-            checked_point=root_coord, arc_width=120
-        )
-        player_coord = actor_dict['player'].coords()
-        los_result = await check_line_of_sight(root_coord, player_coord)
-        if within_fov and los_result == True:
+        if seen_by_player(coord=root_coord, arc_width=120):
             await append_to_log(message=message)
     sow_texture(
         root_coord,
@@ -2166,7 +3567,11 @@ async def spray_debris(
         description=template_message.format(preset),
     )
 
-async def damage_numbers(actor=None, damage=10, squares_above=5):
+def damage_numbers(actor=None, damage=10, squares_above=5, speed=.12):
+    """
+    floats the damage (or healing) done to an actor up from above its head,
+    one tween per digit. the digits show through walls and outside the fov.
+    """
     if not hasattr(actor_dict[actor], 'coords'):
         return
     actor_coords = actor_dict[actor].coords()
@@ -2183,21 +3588,45 @@ async def damage_numbers(actor=None, damage=10, squares_above=5):
         start_coords = actor_coords[0] + (x_pos - 1), actor_coords[1] - 1
         end_coords = start_coords[0], start_coords[1] - squares_above
         if damage[0] == '-':
-            tile = term.red(digit_to_superscript[digit])
+            cell = (digit_to_superscript[digit], 1, -1) #red
         else:
-            tile = term.green(digit_to_superscript[digit])
-        asyncio.ensure_future(
-            travel_along_line(
-                tile=tile,
-                speed=.12,
-                start_coords=start_coords, 
-                end_coords=end_coords,
-                debris=False,
-                animation=False,
-                always_visible=True,
-                no_clip=False,
-            )
-        )
+            cell = (digit_to_superscript[digit], 2, -1) #green
+        points = get_line(start_coords, end_coords)
+        key = (timeline.sequence, x_pos)
+        keyframes = [(0, move_overlay_text, {'key':key, 'coord':points[0], 'cell':cell})]
+        for step in range(1, len(points) - 1):
+            keyframes.append((speed * (step + 1), move_overlay_text, {
+                'key':key, 
+                'coord':points[step], 
+                'last_coord':points[step - 1], 
+                'cell':cell,
+            }))
+        keyframes.append((speed * len(points), move_overlay_text, {
+            'key':key, 'last_coord':points[-2],
+        }))
+        timeline.add(keyframes)
+
+def move_overlay_text(key=None, coord=None, last_coord=None, cell=None):
+    """
+    moves a cell of text_overlay from last_coord to coord. leave out
+    last_coord to add it or coord to take it away.
+
+    tiles holding overlay text are always drawn (override_view), until the
+    last of it leaves and they go back to how they were.
+    """
+    if last_coord != None and last_coord in text_overlay:
+        was_seen, cells = text_overlay[last_coord]
+        cells.pop(key, None)
+        if not cells:
+            del text_overlay[last_coord]
+            map_dict[last_coord].override_view = False
+            if not was_seen:
+                map_dict[last_coord].seen = False
+    if coord != None:
+        if coord not in text_overlay:
+            text_overlay[coord] = (map_dict[coord].seen, {})
+            map_dict[coord].override_view = True
+        text_overlay[coord][1][key] = cell
 
 async def unlock_door(actor_key='player', opens='red'):
     check_dir = state_dict['facing']
@@ -2238,12 +3667,12 @@ def is_passable(checked_coords=(0, 0)):
     """
         returns True if the square is passable and there are no actors in it.
     """
-    has_no_actors = True
-    for actor_name in map_dict[checked_coords].actors:
-        if actor_dict[actor_name].solid:
-            has_no_actors = False
-            break
-    if has_no_actors and map_dict[checked_coords].passable:
+    #both fields come straight from the chunk, unexplored space is a wall:
+    chunk, index = map_dict.chunk_at(checked_coords)
+    if chunk == None:
+        return False
+    has_no_actors = not chunk['solid_count'].item(index)
+    if has_no_actors and chunk['passable'].item(index):
         return True
     else:
         return False
@@ -2364,12 +3793,8 @@ async def bay_door(
         #figure out a way to make this work without a while loop?
         if state_dict['killall'] == True:
             break
-        player_coords = actor_dict['player'].coords()
-        dist_from_player = point_to_point_distance(hinge_coord, player_coords)
         #go into standby mode if too distant:
-        if dist_from_player > 30:
-            await asyncio.sleep(1)
-            continue
+        await wait_while_dormant(name=f'bay_door_{hinge_coord}', coord=hinge_coord)
         await asyncio.sleep(.1)
         for segment in segment_names:
             if segment_name[0] not in actor_dict:
@@ -2641,10 +4066,13 @@ async def spike_trap(
                 )
 
 def check_actors_on_tile(coords=(0, 0), positives=''):
+    if positives == None:
+        return False
+    positives_mask = name_tag_mask(tuple(positives))
+    if positives_mask != None:
+        return bool(map_dict[coords].actors.tags & positives_mask)
     actors_on_square = [actor for actor in map_dict[coords].actors.items()]
     for actor in actors_on_square:
-        if positives == None:
-            continue
         for weight in positives:
             if weight in actor[0]:
                 return True
@@ -2666,16 +4094,17 @@ async def export_map(width=140, height=45):
     y_spread = (
         -height // 2 + player_location[1], height // 2 + player_location[1]
     )
+    glyph_ids = map_dict.region(
+        'tile', 
+        top_left=(x_spread[0], y_spread[0]), 
+        bottom_right=(x_spread[1], y_spread[1]),
+    )
     with open(filename, 'a') as map_file:
-        for y_pos, y in enumerate(range(*y_spread)):
-            with term.location(60, y_pos):
-                row_output = ''.join(
-                    [map_dict[i, y].tile for i in range(*x_spread)]
-                )
-                line_output = f'{row_output}\n'
-                map_file.write(line_output)
-    with term.location(80, 0):
-        await append_to_log(message=f'Wrote nearby map to {filename}.')
+        for row in glyph_ids.T:
+            row_output = ''.join([map_dict.glyphs[i] for i in row])
+            line_output = f'{row_output}\n'
+            map_file.write(line_output)
+    await append_to_log(message=f'Wrote nearby map to {filename}.')
     #return the tile to its original state:
     map_dict[actor_dict['player'].coords()].tile = temp_tile
 
@@ -2686,28 +4115,25 @@ async def display_current_tile(x_offset=105, y_offset=5):
         await asyncio.sleep(.01)
         current_coords = add_coords((-1, 0), actor_dict['player'].coords())
         current_tile = map_dict[current_coords].tile
-        with term.location(x_offset, y_offset):
-            tile_count = state_dict["view_tile_count"]
-            print(f'view_tile_count: {tile_count}')
+        tile_count = state_dict["view_tile_count"]
+        screen_print(coord=(x_offset, y_offset), text=f'view_tile_count: {tile_count}')
         state_dict['view_tile_count'] = 0
-        with term.location(x_offset, y_offset + 1):
-            print('current tile: {current_tile}')
+        screen_print(coord=(x_offset, y_offset + 1), text='current tile: {current_tile}')
         tile_color = map_dict[current_coords].color_num
-        with term.location(x_offset, y_offset + 2):
-            print(f'tile_color: {tile_color}')
-        with term.location(x_offset, y_offset + 3):
-            tile_with_color = term.color(tile_color)(current_tile)
-            print(f'tile w/ color: {tile_with_color}')
-        with term.location(x_offset, y_offset + 4):
-            print('repr() of tile:')
-        with term.location(x_offset, y_offset + 5):
-            print('{repr(current_tile)}        ')
+        screen_print(coord=(x_offset, y_offset + 2), text=f'tile_color: {tile_color}')
+        tile_with_color = term.color(tile_color)(current_tile)
+        screen_print(coord=(x_offset, y_offset + 3), text=f'tile w/ color: {tile_with_color}')
+        screen_print(coord=(x_offset, y_offset + 4), text='repr() of tile:')
+        screen_print(coord=(x_offset, y_offset + 5), text='{repr(current_tile)}        ')
         actors = [key for key in map_dict[current_coords].actors.keys()]
-        with term.location(x_offset, y_offset + 6):
-            print('actors here: {actors}         ')
+        screen_print(coord=(x_offset, y_offset + 6), text='actors here: {actors}         ')
         actors_len = len(map_dict[current_coords].actors.keys())
-        with term.location(x_offset, y_offset + 7):
-            print('actors_len: {actors_len}')
+        screen_print(coord=(x_offset, y_offset + 7), text='actors_len: {actors_len}')
+        materialized_count = map_dict.materialized_count()
+        screen_print(coord=(x_offset, y_offset + 8), text=f'materialized tiles: {materialized_count}')
+        active_count, dormant_count = activity_counts()
+        screen_print(coord=(x_offset, y_offset + 9), text=f'active/dormant: {active_count}/{dormant_count}   ')
+        screen_print(coord=(x_offset, y_offset + 10), text=f'tweens: {timeline.active_count()}   ')
         if len(actors) > 1:
             await asyncio.sleep(1)
 
@@ -2782,8 +4208,7 @@ async def test_print_at_coord(
     (only used in use_action_preset)
     """
     for i in range(1, repeats + 1):
-        with term.location(*coord):
-            print(message, i)
+        screen_print(coord=coord, text=f'{message} {i}')
         await asyncio.sleep(1)
 
 async def use_action_preset(
@@ -3241,6 +4666,7 @@ async def pressure_plate_loop(
     while True:
         if state_dict['killall'] == True:
             break
+        await wait_while_dormant(name=plate_id, coord=test_coord)
         positive_result = check_actors_on_tile(
             coords=test_coord, positives=positives
         )
@@ -3257,6 +4683,7 @@ async def pressure_plate_loop(
                 await asyncio.sleep(off_delay)
             state_dict[patch_to_key][plate_id] = False
             map_dict[test_coord].brightness_mod = brightness_mod[0]
+            forget_activity(plate_id)
             break
         await asyncio.sleep(test_rate)
 
@@ -3380,6 +4807,7 @@ async def swing(
     #remove sword from map_dict:
     del map_dict[print_coord].actors[swing_id]
     del actor_dict[swing_id]
+    release_id(swing_id)
 
 async def sword(
     direction='n',
@@ -3494,6 +4922,7 @@ async def sword(
             del map_dict[segment_coord].actors[segment_name]
         del actor_dict[segment_name]
         await asyncio.sleep(retract_speed)
+    release_id(sword_id)
     if player_sword_track:
         state_dict['player_busy'] = False
 
@@ -4117,12 +5546,10 @@ async def display_items_at_coord(
                             wipe=False,
                         )
                     )
-                with term.location(*icon_location):
-                    print(item_icon)
+                screen_print(coord=icon_location, text=item_icon)
         else:
             current_list_hash = 0
-            with term.location(x_pos, y_pos):
-                print('           ')
+            screen_print(coord=(x_pos, y_pos), text='           ')
         last_list_hash = current_list_hash
 
 async def display_items_on_actor(
@@ -4136,8 +5563,7 @@ async def display_items_on_actor(
         if state_dict['killall'] == True:
             break
         await asyncio.sleep(update_speed)
-        with term.location(x_pos, y_pos):
-            print('Inventory:')
+        screen_print(coord=(x_pos, y_pos), text='Inventory:')
         clear_screen_region(x_size=20, y_size=16, screen_coord=(x_pos, y_pos+1))
         item_list = [item for item in actor_dict[actor_key].holding_items]
         for number, item_id in enumerate(item_list):
@@ -4164,8 +5590,7 @@ async def display_items_on_actor(
             filled_index = round(stripped_length * percent_filled)
             left_half, right_half = formatted_text[:filled_index], formatted_text[filled_index:]
             output_text = f'{item_tile} {left_half}{term.color(0xec)(right_half)} {uses_text}'
-            with term.location(*print_location):
-                print(output_text)
+            screen_print(coord=print_location, text=output_text)
 
 async def filter_print(
     output_text='filter_print default text',
@@ -4198,24 +5623,28 @@ async def filter_print(
         x_location = middle_x + x_offset
     else:
         x_location, y_location = absolute_coord
+    if blocking:
+        pause_fade_in = pause_fade_out = 0
     numbered_chars = [(place, char) for place, char in enumerate(output_text)]
     shuffle(numbered_chars)
-    for char in numbered_chars:
-        with term.location(char[0] + x_location, y_location):
-            print(char[1])
-        if not blocking:
-            await asyncio.sleep(pause_fade_in)
-    shuffle(numbered_chars)
+    keyframes = [
+        (step * pause_fade_in, screen_print, {
+            'coord':(place + x_location, y_location), 'text':char
+        })
+        for step, (place, char) in enumerate(numbered_chars)
+    ]
     if wipe == False:
+        await timeline.play(keyframes)
         return
-    await asyncio.sleep(pause_stay_on)
-    for char in numbered_chars:
-        with term.location(char[0] + x_location, y_location):
-            print(' ')
-        if not blocking:
-            await asyncio.sleep(pause_fade_out)
-        else:
-            asyncio.sleep(pause_fade_out)
+    shuffle(numbered_chars)
+    wipe_start = len(numbered_chars) * pause_fade_in + pause_stay_on
+    keyframes.extend(
+        (wipe_start + step * pause_fade_out, screen_print, {
+            'coord':(place + x_location, y_location), 'text':' '
+        })
+        for step, (place, char) in enumerate(numbered_chars)
+    )
+    await timeline.play(keyframes)
     state_dict['printing'] = False #release hold on printing to the screen
     await asyncio.sleep(1)
 
@@ -4225,12 +5654,9 @@ def print_debug_grid():
     """
     for y in range(term.height // 5):
         for x in range(term.width // 5):
-            with term.location(x * 5, y * 5):
-                print('┼')
-            with term.location(x * 5, y * 5 + 1):
-                print(' {0: >2}'.format(x * 5))
-            with term.location(x * 5, y * 5 + 2):
-                print(' {0: >2}'.format(y * 5))
+            screen_print(coord=(x * 5, y * 5), text='┼')
+            screen_print(coord=(x * 5, y * 5 + 1), text=' {0: >2}'.format(x * 5))
+            screen_print(coord=(x * 5, y * 5 + 2), text=' {0: >2}'.format(y * 5))
 
 def append_description(coord, added_message, separator="||"):
     map_dict[coord].description = (
@@ -4287,8 +5713,8 @@ def clear():
     """
     clears the screen.
     """
-    # check and make call for specific operating system
-    _ = call('clear' if os.name =='posix' else 'cls')
+    screen.backend.clear()
+    screen.invalidate()
 
 def secret_door(
     door_coord=(0, 0), 
@@ -4506,6 +5932,8 @@ def spawn_static_actor(
         made_of=material,
     )
     map_dict[spawn_coord].actors[actor_id] = True
+    if blocking or multi_tile_parent != None:
+        map_changed()
     return actor_id
 
 def map_init():
@@ -4790,13 +6218,11 @@ async def handle_exit(key):
     term_location = (
         middle_x - int(len(quit_question_text)/2), middle_y - 20
     )
-    with term.location(*term_location):
-        print(quit_question_text)
+    screen_print(coord=term_location, text=quit_question_text)
     if key in 'yY':
         state_dict['killall'] = True #trigger shutdown condition
     elif key in 'nN': #exit menus
-        with term.location(*term_location):
-            print(' ' * len(quit_question_text))
+        screen_print(coord=term_location, text=' ' * len(quit_question_text))
         state_dict['exiting'] = False
 
 def display_item_choice_labels(clear=False):
@@ -4808,8 +6234,7 @@ def display_item_choice_labels(clear=False):
             label_text = f'{item_choice_label}:'
         else:
             label_text = '  '
-        with term.location(*coords):
-            print(label_text)
+        screen_print(coord=coords, text=label_text)
 
 async def free_look(
     key,
@@ -4874,7 +6299,7 @@ async def free_look(
         )
         debounce = True
     elif key in 'x':
-        can_see = await check_line_of_sight(player_coord, describe_coord)
+        can_see = describe_coord in get_visible_coords(origin=player_coord)
         if can_see:
             asyncio.ensure_future(examine_tile(describe_coord))
         else:
@@ -5126,6 +6551,10 @@ async def examine_tile(examined_coord=None, tense='present'):
                 actor_description = next(actor_dict[actor].description)
             else:
                 actor_description = actor_dict[actor].description
+    #particles are drawn over actors, so they're described first:
+    if examined_coord in particle_pool.tile_slots:
+        has_visible_actor = True
+        actor_description = particle_pool.description_at(examined_coord)
     if map_dict[examined_coord].door_type != '':
         is_secret = 'secret' in map_dict[examined_coord].door_type
     if has_visible_actor:
@@ -5222,15 +6651,13 @@ async def use_action(tile_coords=None, is_async=True, debug=False):
     if debug:
         if bool(map_dict[tile_coords].actors): #debug for use actions
             for index, actor in enumerate(map_dict[tile_coords].actors):
-                with term.location(55, index + 1):
-                    print("actor:", actor)
+                screen_print(coord=(55, index + 1), text=f'actor: {actor}')
     use_action = None
     #TODO: add use_actions to actors and correctly catch them here:
     #BOOKMARK
     if map_dict[tile_coords].actors:
         actors_on_tile = list(iter(map_dict[tile_coords].actors))
-        with term.location(55, randint(0, 10)):
-            print(5230, actors_on_tile)
+        screen_print(coord=(55, randint(0, 10)), text=f'5230 {actors_on_tile}')
     if map_dict[tile_coords] != None and use_action == None:
         use_action = map_dict[tile_coords].use_action_func
         use_action_kwargs = map_dict[tile_coords].use_action_kwargs
@@ -5439,8 +6866,7 @@ async def print_icon(x_coord=0, y_coord=20, icon_name='block wand'):
         ),
     }
     for (num, line) in enumerate(icons[icon_name]):
-        with term.location(*add_coords((x_coord, y_coord), (0, num))):
-            print(line)
+        screen_print(coord=add_coords((x_coord, y_coord), (0, num)), text=line)
 
 async def use_item_by_inventory_number(number=0, describe=False):
     """
@@ -5484,8 +6910,7 @@ async def choose_item(
     state_dict['menu_choices'] = menu_choices
     state_dict['in_menu'] = True
     for (number, item) in enumerate(item_id_choices):
-        with term.location(x_pos, y_pos + number):
-            print(f'{str(hex(number))[-1]}:')
+        screen_print(coord=(x_pos, y_pos + number), text=f'{str(hex(number))[-1]}:')
     menu_choices = [str(hex(i))[-1] for i in range(16)]
     return_val = None
     while state_dict['in_menu']:
@@ -5544,8 +6969,7 @@ async def console_box(
                 suffix = ""
             line_text = f'{message}{suffix}'
             line_y = index + y_margin
-            with term.location(x_margin, line_y):
-                print(line_text.ljust(width + 2, ' '))
+            screen_print(coord=(x_margin, line_y), text=line_text.ljust(width + 2, ' '))
         await asyncio.sleep(refresh_rate)
 
 async def log_sound(
@@ -5608,30 +7032,27 @@ async def append_to_log(
             formatted_message = f'{starting_indicator} {line}'
         else:
             formatted_message = f'  {line}'
-        asyncio.ensure_future(
-            filter_into_log(
-                message=formatted_message, 
-                line_index=line_index,
-            )
-        )
+        filter_into_log(message=formatted_message, line_index=line_index)
     if wipe:
         for index_offset, line in enumerate(reversed(padded_lines)):
             await asyncio.sleep(wipe_time)
-            asyncio.ensure_future(
-                filter_into_log(
-                    starting_text=line,
-                    message=wipe_text,
-                    line_index=line_index,
-                    time_between_chars=.02
-                )
+            filter_into_log(
+                starting_text=line,
+                message=wipe_text,
+                line_index=line_index,
+                time_between_chars=.02
             )
 
-async def filter_into_log(
+def filter_into_log(
     message="This is a test",
     line_index=0,
     time_between_chars=.015,
     starting_text=''
 ):
+    """
+    writes message into a line of the log one character at a time, in a
+    random order, as a tween (see Timeline).
+    """
     #TODO: add option of colorized text in console log messages
     if starting_text == '':
         written_string = [' '] * len(message)
@@ -5639,12 +7060,22 @@ async def filter_into_log(
         written_string = list(starting_text)
     indexes = [index for index in range(len(message))]
     shuffle(indexes)
-    for index in indexes:
-        await asyncio.sleep(time_between_chars)
-        written_string[index] = message[index]
-        state_dict['messages'][line_index] = (
-            ''.join(written_string), hash(message)
-        )
+    keyframes = [
+        (step * time_between_chars, write_log_char, {
+            'written_string':written_string,
+            'index':index,
+            'message':message,
+            'line_index':line_index,
+        })
+        for step, index in enumerate(indexes, start=1)
+    ]
+    timeline.add(keyframes)
+
+def write_log_char(written_string=None, index=0, message='', line_index=0):
+    written_string[index] = message[index]
+    state_dict['messages'][line_index] = (
+        ''.join(written_string), hash(message)
+    )
 
 async def key_slot_checker(
     slot='q', frequency=.1, centered=False, print_location=(0, 0),
@@ -5674,10 +7105,8 @@ async def key_slot_checker(
             x_coord, y_coord = offset_of_center(print_location)
         else:
             x_coord, y_coord = print_location
-        with term.location(x_coord + 2, y_coord + 5):
-            print(term.color(slot_color)(slot))
-        with term.location(x_coord, y_coord + 6):
-            print('─────')
+        screen_print(coord=(x_coord + 2, y_coord + 5), text=term.color(slot_color)(slot))
+        screen_print(coord=(x_coord, y_coord + 6), text='─────')
         icon_used = item_name
         if item_name != 'empty':
             if item_dict[equipped_item_id].custom_icon != None:
@@ -5723,6 +7152,7 @@ async def battery_effect(item_id=None, num_charges=6,):
         if item_dict[item_id].uses <= 0:
             del item_dict[item_id]
             del actor_dict['player'].holding_items[item_id]
+            release_id(item_id)
 
 async def siphon_token_effect(
     center_on_actor_id=None,
@@ -5740,6 +7170,7 @@ async def siphon_token_effect(
         if item_dict[item_id].uses <= 0:
             del item_dict[item_id]
             del actor_dict['player'].holding_items[item_id]
+            release_id(item_id)
     actor_coords = actor_dict[center_on_actor_id].coords()
     points = get_circle(center=actor_coords, radius=effect_radius)
     actor_ids = []
@@ -5865,18 +7296,23 @@ async def parse_announcement(tile_coord_key, delay=1):
             await append_to_log(message=line)
         await asyncio.sleep(delay)
 
-async def trigger_announcement(tile_coord_key, player_coords=(0, 0)):
+def trigger_announcement(tile_coord_key, player_coords=(0, 0)):
+    """
+    starts the tile's announcement once the player is within its
+    distance_trigger. the tile is marked seen before the announcement task
+    is started so that later frames don't start it again.
+    """
     is_announcing = map_dict[tile_coord_key].announcing
     yet_seen = map_dict[tile_coord_key].seen
     if is_announcing and not yet_seen:
-        if map_dict[tile_coord_key].distance_trigger:
+        distance_trigger = map_dict[tile_coord_key].distance_trigger
+        if distance_trigger:
             distance = point_to_point_distance(tile_coord_key, player_coords)
-            if distance <= map_dict[tile_coord_key].distance_trigger:
-                map_dict[tile_coord_key].seen = True
-                await parse_announcement(tile_coord_key)
-        else:
-            map_dict[tile_coord_key].seen = True
-            await parse_announcement(tile_coord_key)
+            if distance > distance_trigger:
+                return
+        map_dict[tile_coord_key].seen = True
+        #announcements sleep between lines so they can't hold up the frame:
+        asyncio.ensure_future(parse_announcement(tile_coord_key))
     elif state_dict['plane'] == 'normal':
         map_dict[tile_coord_key].seen = True
 
@@ -5888,14 +7324,38 @@ def point_to_point_distance(point_a, point_b):
     return distance
 
 def get_circle(center=(0, 0), radius=5):
-    radius_range = [i for i in range(-radius, radius + 1)]
-    result = []
-    for x in radius_range:
-       for y in radius_range:
-           distance = sqrt(x**2 + y**2)
-           if distance <= radius:
-               result.append((center[0] + x, center[1] + y))
-    return result
+    return shape_at(circle_offsets(radius), center)
+
+@lru_cache(maxsize=None)
+def circle_mask(radius=5, inner_radius=None):
+    """
+    a (2 * radius + 1) square boolean array, True for the cells no further
+    than radius from the middle one (and further than inner_radius, if
+    given). indexed [x, y], with the middle at [radius, radius].
+
+    cached, so it's read only.
+    """
+    steps = arange(-radius, radius + 1)
+    distances_squared = steps[:, None] ** 2 + steps[None, :] ** 2
+    mask = distances_squared <= radius ** 2
+    if inner_radius != None:
+        mask &= distances_squared > inner_radius ** 2
+    mask.flags.writeable = False
+    return mask
+
+@lru_cache(maxsize=None)
+def circle_offsets(radius=5, inner_radius=None):
+    """
+    the offsets from (0, 0) of the cells of circle_mask as an (n, 2) array,
+    in the same order get_circle has always given them (x, then y).
+    """
+    offsets = argwhere(circle_mask(radius, inner_radius)) - radius
+    offsets.flags.writeable = False
+    return offsets
+
+def shape_at(offsets, center=(0, 0)):
+    """ a list of coords, offsets (see circle_offsets) moved to center """
+    return list(map(tuple, (offsets + center).tolist()))
 
 def get_line(start, end):
     """Bresenham's Line Algorithm
@@ -6072,16 +7532,32 @@ async def crosshairs(
             ]
             if old_points != None:
                 for point in old_points:
-                    with term.location(*point):
-                        print(' ')
+                    screen_print(coord=point, text=' ')
             #write current location of crosshairs to screen
             for char, point in zip(crosshair_chars, points):
-                with term.location(*point):
-                    print(char)
+                screen_print(coord=point, text=char)
             old_points = points
         last_angle = current_angle
         await asyncio.sleep(refresh_delay)
 #UI/HUD functions---------------------------------------------------------------
+def screen_print(coord=(0, 0), text=''):
+    """
+    writes text at a screen coordinate. 
+    nothing reaches the terminal until the next screen.flush()
+    """
+    screen.write(coord=coord, text=text)
+
+def text_to_cell(text=' '):
+    """
+    the (glyph, fg, bg) cell of the first character of a formatted string.
+    """
+    if len(text) == 1:
+        return (text, -1, -1)
+    cells = screen.get_cells(text)
+    if cells:
+        return cells[0][1]
+    return (' ', -1, -1)
+
 
 async def display_help(mode="normal"):
     """
@@ -6134,6 +7610,163 @@ async def display_help(mode="normal"):
             )
         )
 
+def blocks_sight(coord=(0, 0), origin=(0, 0)):
+    """
+    whether a tile stops sight from passing beyond it when seen from origin.
+
+    mirrors the rules in check_line_of_sight: walls and blocking actors
+    are opaque, magic doors show something else behind them and a line of
+    sight can pass through at most one tile of a multi tile entity.
+    """
+    chunk, index = map_dict.chunk_at(coord)
+    if chunk == None:
+        return True
+    if chunk['blocking'].item(index) or chunk['magic'].item(index):
+        return True
+    if chunk['blocking_count'].item(index):
+        return True
+    if map_dict[coord].actors.tags & tag_bits['mte'] and coord != origin:
+        #TODO: allow for transparent MTEs
+        previous_point = get_line(origin, coord)[-2]
+        if map_dict[previous_point].actors.tags & tag_bits['mte']:
+            return True
+    return False
+
+def compute_fov(origin=(0, 0), radius=18):
+    """
+    recursive shadowcasting: returns the set of coords visible from origin
+    in one pass over the eight octants around it.
+
+    a tile that blocks sight is itself visible but shadows what's behind it.
+    """
+    octants = (
+        (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+        (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+    )
+    visible = {origin}
+    opaque = {}
+    radius_squared = radius ** 2
+    #walls, magic doors and blocking actors for the whole area come from the
+    #map arrays:
+    top_left = (origin[0] - radius, origin[1] - radius)
+    bottom_right = (origin[0] + radius + 1, origin[1] + radius + 1)
+    opaque_tiles = (
+        map_dict.region('blocking', top_left, bottom_right) |
+        map_dict.region('magic', top_left, bottom_right) |
+        (map_dict.region('blocking_count', top_left, bottom_right) > 0)
+    ).tolist()
+
+    def is_opaque(coord):
+        if coord not in opaque:
+            if opaque_tiles[coord[0] - top_left[0]][coord[1] - top_left[1]]:
+                opaque[coord] = True
+            else:
+                opaque[coord] = blocks_sight(coord=coord, origin=origin)
+        return opaque[coord]
+
+    def cast_light(row, start_slope, end_slope, xx, xy, yx, yy):
+        if start_slope < end_slope:
+            return
+        next_start_slope = start_slope
+        for distance in range(row, radius + 1):
+            blocked = False
+            delta_y = -distance
+            for delta_x in range(-distance, 1):
+                left_slope = (delta_x - .5) / (delta_y + .5)
+                right_slope = (delta_x + .5) / (delta_y - .5)
+                if start_slope < right_slope:
+                    continue
+                elif end_slope > left_slope:
+                    break
+                coord = (
+                    origin[0] + delta_x * xx + delta_y * xy,
+                    origin[1] + delta_x * yx + delta_y * yy,
+                )
+                if delta_x ** 2 + delta_y ** 2 < radius_squared:
+                    visible.add(coord)
+                if blocked:
+                    if is_opaque(coord):
+                        next_start_slope = right_slope
+                    else:
+                        blocked = False
+                        start_slope = next_start_slope
+                elif is_opaque(coord) and distance < radius:
+                    blocked = True
+                    cast_light(
+                        distance + 1, start_slope, left_slope, xx, xy, yx, yy
+                    )
+                    next_start_slope = right_slope
+            if blocked:
+                break
+
+    for xx, xy, yx, yy in octants:
+        cast_light(1, 1.0, 0.0, xx, xy, yx, yy)
+    return visible
+
+def get_visible_coords(origin=None, radius=18):
+    """
+    returns the cached field of view from origin (the player by default).
+
+    the set is only recomputed when the origin moves or map_changed has
+    been called since it was built. visible magic doors are kept in
+    state_dict['fov magic doors'].
+    """
+    if origin == None:
+        origin = actor_dict['player'].coords()
+    fov_key = (origin, radius, state_dict['map version'])
+    if state_dict['fov key'] != fov_key:
+        visible_coords = compute_fov(origin=origin, radius=radius)
+        state_dict['fov'] = visible_coords
+        state_dict['fov magic doors'] = {
+            coord for coord in visible_coords
+            if coord != origin and map_dict[coord].magic
+        }
+        state_dict['fov key'] = fov_key
+    return state_dict['fov']
+
+@lru_cache(maxsize=None)
+def offset_angle(offset=(0, 0)):
+    """
+    the angle of an offset from a point, clockwise from twelve o'clock, the
+    same as check_point_within_arc finds.
+    """
+    found_angle = round(find_angle(p0=(0, -5), p1=(0, 0), p2=offset))
+    if offset[0] < 0:
+        found_angle = 360 - found_angle
+    return found_angle
+
+def update_visibility_snapshot(origin=(0, 0), visible_coords=set()):
+    """
+    records what the player can see this frame, for seen_by_player: the
+    angle of every visible coord from origin and which way they're facing.
+    """
+    state_dict['visibility snapshot'] = {
+        coord:offset_angle((coord[0] - origin[0], coord[1] - origin[1]))
+        for coord in visible_coords
+    }
+    state_dict['visibility facing'] = dir_to_angle(
+        state_dict['facing'], mirror_ns=True
+    )
+
+def seen_by_player(coord=(0, 0), arc_width=120):
+    """
+    whether coord was in the player's field of view in the last frame and
+    within arc_width of the way they were facing.
+
+    a lookup into the snapshot taken by view_frame_loop, standing in for
+    check_point_within_arc plus a line of sight check.
+    """
+    snapshot = state_dict['visibility snapshot']
+    if coord not in snapshot:
+        return False
+    facing_angle = state_dict['visibility facing']
+    half_arc = arc_width / 2
+    return angle_in_arc(
+        given_angle=snapshot[coord],
+        arc_begin=(facing_angle - half_arc) % 360,
+        arc_end=(facing_angle + half_arc) % 360,
+    )
+
 async def check_line_of_sight(coord_a, coord_b):
     """
     intended to be used for occlusion.
@@ -6144,17 +7777,17 @@ async def check_line_of_sight(coord_a, coord_b):
     display the tile
     """
     points = get_line(coord_a, coord_b)
-    has_magic = any([map_dict[point].magic for point in points])
+    has_magic = any(map_dict.fields_along(points, ('magic',))[0])
     #since walls and thin corridors are special cases,
     #if the last coord is blocking, just change coord_b to check the new non-wall tile
-    if map_dict[coord_b].blocking:
+    if map_dict.field_at(coord_b, 'blocking'):
         neighbor_coords = [
             add_coords(coord_b, dir_to_offset(direction)) for direction in ('n', 'e', 's', 'w')
         ]
         non_walls = []
         for coord in neighbor_coords:
-            not_blocking = not map_dict[coord].blocking
-            explored = map_dict[coord].seen
+            not_blocking = not map_dict.field_at(coord, 'blocking')
+            explored = map_dict.field_at(coord, 'seen')
             if not_blocking and explored:
                 non_walls.append(coord)
         if len(non_walls) == 0 and not has_magic: #we're in the middle of a wall
@@ -6170,24 +7803,27 @@ async def check_line_of_sight(coord_a, coord_b):
     walls = 0
     blocking_actor_index = None
     inside_mte = False 
+    magic, blocking, blocking_count = map_dict.fields_along(
+        points, ('magic', 'blocking', 'blocking_count')
+    )
     for index, point in enumerate(points[:-1]):
-        if map_dict[point].actors:
-            for key in map_dict[point].actors:
-                if 'mte' in key:
-                    #TODO: allow for transparent MTEs
-                    if inside_mte:
-                        return False
-                    else:
-                        inside_mte = True
+        if map_dict.get_field(point, 'actors').tags & tag_bits['mte']:
+            #TODO: allow for transparent MTEs
+            #every segment counts, so two on one tile already block sight:
+            segments = sum(
+                1 for actor in map_dict[point].actors
+                if getattr(actor_dict.get(actor), 'tags', 0) & tag_bits['mte']
+            )
+            if inside_mte or segments > 1:
+                return False
+            else:
+                inside_mte = True
         #TODO: make magic doors correctly be blocked behind MTEs
-        if map_dict[point].magic == True:
+        if magic[index] == True:
             return await handle_magic_door(point=point, last_point=points[-1])
-        elif map_dict[point].blocking == False:
-            if map_dict[point].actors != None:
-                for actor in map_dict[point].actors:
-                    if actor_dict[actor].blocking:
-                        blocking_actor_index = index
-                        break
+        elif blocking[index] == False:
+            if blocking_count[index]:
+                blocking_actor_index = index
         else:
             walls += 1
     if blocking_actor_index != None:
@@ -6242,125 +7878,126 @@ def get_term_middle():
     middle_x, middle_y = (int(term.width / 2 - 2), int(term.height / 2 - 2))
     return (middle_x, middle_y)
 
-async def view_tile(map_dict, x_offset=1, y_offset=1, threshold=15, fov=140):
-    """ handles displaying data from map_dict """
-    #distance from offsets to center of field of view
-    distance = sqrt(abs(x_offset)**2 + abs(y_offset)**2) 
-    await asyncio.sleep(random()/5 * distance) #stagger starting_time
-    middle_x, middle_y = (int(term.width / 2 - 2), int(term.height / 2 - 2))
-    previous_tile = None
-    print_location = add_coords((middle_x, middle_y), (-x_offset, -y_offset))
+async def view_tile(
+    x_offset=1,
+    y_offset=1,
+    distance=0,
+    player_coords=(0, 0),
+    visible_coords=set(),
+    fov=140,
+    view_fields=None,
+):
+    """
+    returns the (glyph, fg, bg) cell to display for one cell of the view.
+
+    called once per cell per frame by view_frame_loop, visible_coords is
+    the frame's result from get_visible_coords and view_fields its
+    read_view_fields. without view_fields the cell's fields are read here.
+    """
     angle_from_twelve = find_angle(p0=(0, 5), p2=(x_offset, y_offset))
-    last_print_choice = ' '
     if x_offset <= 0:
         angle_from_twelve = 360 - angle_from_twelve
-    display = False
-    player_coords = actor_dict['player'].coords()
-    last_mirror = state_dict['mirrored']
-    while True:
-        if state_dict['mirrored'] == True:
-            print_tuple = (-x_offset, -y_offset)
-        else:
-            print_tuple = (x_offset, y_offset)
-        if last_mirror != state_dict['mirrored']:
-            print_choice = ' '
-        print_location = add_coords((middle_x, middle_y), print_tuple)
-        if state_dict['killall'] == True:
-            break
-        state_dict["view_tile_count"] += 1
-        await asyncio.sleep(distance * .0075 + .05 + random() * .1) #update speed
-        if not state_dict['lock view']:
-            player_coords = actor_dict['player'].coords()
-        x_display_coord, y_display_coord = (
-            add_coords(player_coords, (x_offset, y_offset))
-        )
-        tile_coord_key = (x_display_coord, y_display_coord)
-        #check whether the current tile is within the current field of view
-        current_angle = state_dict['current_angle']
-        l_angle, r_angle = (
-            (current_angle - fov // 2) % 360, 
-            (current_angle + fov // 2) % 360
-        )
-        display = angle_in_arc(
-            angle_from_twelve,
-            arc_begin=l_angle,
-            arc_end=r_angle
+    x_display_coord, y_display_coord = (
+        add_coords(player_coords, (x_offset, y_offset))
+    )
+    tile_coord_key = (x_display_coord, y_display_coord)
+    if view_fields == None:
+        view_fields = read_view_fields(
+            top_left=tile_coord_key, bottom_right=add_coords(tile_coord_key, (1, 1))
         )
-        if state_dict['plane'] == 'nightmare':
-            #figure out how to -not- display nightmare remembered tiles (no memory)
-            color_choice = 0
-        else:
-            color_choice = 0xe9 #a dark gray
-        if (x_offset, y_offset) == (0, 0):
-            display=True
-        if state_dict['blinded'] == True:
-            print_choice = ' '
-        elif map_dict[x_display_coord, y_display_coord].override_view:
-            print_choice = await check_contents_of_tile((x_display_coord, y_display_coord))
-            map_dict[tile_coord_key].seen = True
-        elif display:
+    (left, top), fields = view_fields
+    column, row = x_display_coord - left, y_display_coord - top
+    seen = fields['seen'][column][row]
+    #check whether the current tile is within the current field of view
+    current_angle = state_dict['current_angle']
+    l_angle, r_angle = (
+        (current_angle - fov // 2) % 360, 
+        (current_angle + fov // 2) % 360
+    )
+    display = angle_in_arc(
+        angle_from_twelve,
+        arc_begin=l_angle,
+        arc_end=r_angle
+    )
+    if state_dict['plane'] == 'nightmare':
+        #figure out how to -not- display nightmare remembered tiles (no memory)
+        color_choice = 0
+    else:
+        color_choice = 0xe9 #a dark gray
+    if (x_offset, y_offset) == (0, 0):
+        display=True
+    if state_dict['blinded'] == True:
+        print_choice = (' ', -1, -1)
+    elif fields['override_view'][column][row]:
+        print_choice = await check_contents_of_tile((x_display_coord, y_display_coord))
+        map_dict[tile_coord_key].seen = True
+    elif display:
+        if tile_coord_key in visible_coords:
+            line_of_sight_result = True
+        elif state_dict['fov magic doors']:
+            #only tiles seen through a magic door still need a traced ray:
             line_of_sight_result = await check_line_of_sight(
                 player_coords,
                 tile_coord_key
             )
-            if type(line_of_sight_result) == tuple:
-                print_choice = await check_contents_of_tile(line_of_sight_result)
-            elif line_of_sight_result == True:
-                await trigger_announcement(
-                    tile_coord_key,
-                    player_coords=player_coords
-                )
-                print_choice = await check_contents_of_tile(tile_coord_key)
-            elif line_of_sight_result != False and line_of_sight_result != None:
-                #catches tiles beyond magic doors:
-                print_choice = line_of_sight_result
-            elif line_of_sight_result == False and map_dict[tile_coord_key].seen:
-                remembered_tile = term.strip(
-                    map_dict[x_display_coord, y_display_coord].tile
-                )
-                print_choice = term.color(color_choice)(str(remembered_tile))
-            else:
-                #catches tiles blocked from view:
-                print_choice = ' '
-        elif not display and map_dict[x_display_coord, y_display_coord].seen:
-            remembered_tile = map_dict[x_display_coord, y_display_coord].tile
-            if map_dict[x_display_coord, y_display_coord].actors:
-                for key in map_dict[x_display_coord, y_display_coord].actors.keys():
-                    if actor_dict[key].multi_tile_parent != None:
-                        remembered_tile = actor_dict[str(key)].tile
-                        break
-            elif map_dict[x_display_coord, y_display_coord].items:
-                for item_id in map_dict[x_display_coord, y_display_coord].items:
-                    remembered_tile = item_dict[item_id].tile
-                    break
-            print_choice = term.color(color_choice)(
-                term.strip(str(remembered_tile))
-            )
+            if type(line_of_sight_result) != tuple:
+                line_of_sight_result = False
         else:
-            #catches tiles that are not within current FOV
-            print_choice = ' '
-        # only print something if it has changed:
-        if last_print_choice != print_choice:
-            tile_color = map_dict[tile_coord_key].color_num
-            brightness_mod = map_dict[tile_coord_key].brightness_mod
-            tile_brightness = get_brightness(distance, brightness_mod)
-            no_background = ('▓', '░', '▞', '■', '▣', '@', '║', ' ')
-            if not state_dict['lock view']:
-                color_tuple = get_brightness_val(int(tile_brightness))
-            #if view locked, display a slightly fuzzy but uniform view:
-            else:
-                color_tuple = get_brightness_val(9 + randint(-2, 2))
-            if term.strip(print_choice) in no_background:
-                print_choice = term.color(color_tuple[0])(print_choice)
-            else:
-                print_choice = term.color(tile_color)(print_choice)
-        if last_print_choice == print_choice:
-            #BOOKMARK: bottleneck, kind of a kludge
-            if random() > .05: #19 times out of 20, don't reprint the tile
-                continue
-        with term.location(*print_location):
-            print(print_choice)
-        last_print_choice = print_choice
+            line_of_sight_result = False
+        if type(line_of_sight_result) == tuple:
+            print_choice = await check_contents_of_tile(line_of_sight_result)
+        elif line_of_sight_result == True:
+            trigger_announcement(tile_coord_key, player_coords=player_coords)
+            print_choice = await check_contents_of_tile(tile_coord_key)
+        elif seen:
+            remembered_tile = map_dict.glyphs[fields['tile'][column][row]]
+            remembered_glyph = text_to_cell(remembered_tile)[0]
+            print_choice = (remembered_glyph, color_choice, -1)
+        else:
+            #catches tiles blocked from view:
+            print_choice = (' ', -1, -1)
+    elif not display and seen:
+        remembered_tile = map_dict.glyphs[fields['tile'][column][row]]
+        if map_dict[x_display_coord, y_display_coord].actors:
+            for key in map_dict[x_display_coord, y_display_coord].actors.keys():
+                if actor_dict[key].multi_tile_parent != None:
+                    remembered_tile = actor_dict[str(key)].tile
+                    break
+        elif map_dict[x_display_coord, y_display_coord].items:
+            for item_id in map_dict[x_display_coord, y_display_coord].items:
+                remembered_tile = item_dict[item_id].tile
+                break
+        print_choice = (text_to_cell(remembered_tile)[0], color_choice, -1)
+    else:
+        #catches tiles that are not within current FOV
+        print_choice = (' ', -1, -1)
+    tile_color = fields['color_num'][column][row]
+    brightness_mod = fields['brightness_mod'][column][row]
+    no_background = ('▓', '░', '▞', '■', '▣', '@', '║', ' ')
+    if not state_dict['lock view']:
+        brightness_color = get_brightness_color(distance, brightness_mod)
+    #if view locked, display a slightly fuzzy but uniform view:
+    else:
+        brightness_color = get_brightness_val(9 + randint(-2, 2))[0]
+    glyph, fg, bg = print_choice
+    #a color the tile already carries wins over the lighting:
+    if fg != -1:
+        return print_choice
+    elif glyph in no_background:
+        return (glyph, brightness_color, bg)
+    else:
+        return (glyph, tile_color, bg)
+
+def read_view_fields(top_left=(0, 0), bottom_right=(1, 1)):
+    """
+    the array fields that view_tile reads, in one region read each over the
+    rectangle from top_left up to bottom_right.
+
+    returns (top_left, {field:nested lists indexed [x][y] from top_left}).
+    """
+    fields = ('override_view', 'seen', 'tile', 'color_num', 'brightness_mod')
+    outputs = map_dict.regions(fields, top_left, bottom_right)
+    return top_left, {field:output.tolist() for field, output in outputs.items()}
 
 def get_brightness(
     distance=1, 
@@ -6368,33 +8005,62 @@ def get_brightness(
     constant_modifier=27,
 ):
     """
-    unused: lower_limit=0xe8, upper_limit=0x100
+    returns an index into brightness_vals for a tile at a distance.
+
+    distance is bucketed to quarter tiles and brightness_mod to quarter
+    steps, each combination is computed once and kept in brightness_lut.
+    dither_source picks between the stored values so tiles still flicker
+    between neighbouring brightnesses.
+    """
+    lut_key = (int(distance * 4), round(brightness_mod * 4), constant_modifier)
+    if lut_key not in brightness_lut:
+        brightness_lut[lut_key] = brightness_lut_entry(
+            distance=lut_key[0] / 4,
+            brightness_mod=lut_key[1] / 4,
+            constant_modifier=constant_modifier,
+        )
+    return brightness_lut[lut_key][next(dither_source)]
+
+def brightness_lut_entry(
+    distance=1, 
+    brightness_mod=0,
+    constant_modifier=27,
+    dither_steps=4,
+):
+    """
     brighness falls off according to the below equation
 
-    the random element makes it so the returned value sometimes rounds up or
-    down to a nearby value.
+    a random element of up to .75 used to be added to every lookup so the
+    value sometimes rounds up or down to a nearby value, the entry stores
+    the result for evenly spaced samples of that random element instead.
 
     The greyscale values lie between 0xe8 (near-black) and 0x100 (white)
     """
     inverse_square_part = -(30 / (.5 * ((distance/2) + 3)))
-    random_component = random() * .75
-    summed_components = sum(
-        [
-            inverse_square_part, 
-            constant_modifier, 
-            brightness_mod, 
-            random_component
-        ]
-    )
-    whole_brightness_value = int(round(summed_components, 1))
     num_brightness_vals = get_brightness_val(0, get_length=True) - 1
-    if whole_brightness_value <= 0:
-        return 0
-    elif whole_brightness_value >= num_brightness_vals:
-        return num_brightness_vals
-    return whole_brightness_value
+    entry = []
+    for step in range(dither_steps):
+        random_component = (step + .5) / dither_steps * .75
+        summed_components = (
+            inverse_square_part + constant_modifier + brightness_mod + random_component
+        )
+        whole_brightness_value = int(round(summed_components, 1))
+        entry.append(min(max(whole_brightness_value, 0), num_brightness_vals))
+    return tuple(entry)
+
+def get_brightness_color(distance=1, brightness_mod=0):
+    """
+    the greyscale color number for a view tile at a distance from the
+    player, looked up through get_brightness.
+    """
+    return brightness_vals[get_brightness(distance, brightness_mod)][0]
 
 async def check_contents_of_tile(coord):
+    """ returns the (glyph, fg, bg) cell for whatever is on top at coord """
+    if coord in particle_pool.tile_slots:
+        return particle_pool.get_cell(coord)
+    if coord in text_overlay:
+        return next(reversed(text_overlay[coord][1].values()))
     return_val = None
     if map_dict[coord].actors:
         for actor_name in map_dict[coord].actors:
@@ -6402,22 +8068,16 @@ async def check_contents_of_tile(coord):
             y_hide_coord = actor_dict[actor_name].y_hide_coord
             player_coords = actor_dict['player'].coords()
             if y_hide_coord == None:
-                return_val = actor_dict[actor_name].get_view()
+                return_val = actor_dict[actor_name].get_cell()
             elif player_coords[1] >= y_hide_coord[1]:
                 if actor_dict[actor_name] != [None]:
-                    return_val = actor_dict[actor_name].get_view()
+                    return_val = actor_dict[actor_name].get_cell()
     if return_val == None:
         if map_dict[coord].items:
             item_name = next(iter(map_dict[coord].items))
-            return_val = item_dict[item_name].tile
-        elif map_dict[coord].is_animated:
-            return_val = next(map_dict[coord].animation)
+            return_val = text_to_cell(item_dict[item_name].tile)
         else:
-            if map_dict[coord].color_num not in (7, 8):
-                tile_color = map_dict[coord].color_num
-                return_val = term.color(tile_color)(map_dict[coord].tile)
-            else:
-                return_val = map_dict[coord].tile
+            return_val = map_dict[coord].get_cell()
     return return_val
 
 def offset_of_center(coord):
@@ -6441,8 +8101,7 @@ def clear_screen_region(
     else:
         marker = ' '
     for y in range(screen_coord[1], screen_coord[1] + y_size):
-        with term.location(screen_coord[0], y):
-            print(marker * x_size)
+        screen_print(coord=(screen_coord[0], y), text=marker * x_size)
 
 async def ui_box_draw(
     position="top left",
@@ -6474,15 +8133,11 @@ async def ui_box_draw(
         if state_dict['killall'] == True:
             break
         await asyncio.sleep(1)
-        with term.location(x_print, y_print):
-            print(top_bar)
-        with term.location(x_print, y_print + box_height + 1):
-            print(bottom_bar)
+        screen_print(coord=(x_print, y_print), text=top_bar)
+        screen_print(coord=(x_print, y_print + box_height + 1), text=bottom_bar)
         for row in range(y_print + 1, y_print + box_height + 1):
-            with term.location(x_print, row):
-                print("│")
-            with term.location(x_print + box_width + 1, row):
-                print("│")
+            screen_print(coord=(x_print, row), text="│")
+            screen_print(coord=(x_print + box_width + 1, row), text="│")
         if one_time:
             break
 
@@ -6584,14 +8239,15 @@ async def directional_alert(
             angle_from_twelve=angle,
         )
         ui_points.append(point)
+    keyframes, delay = [], 0
     for tile_palette in [palette, ' ']:
         shuffle(ui_points)
         for point in ui_points:
             tile_choice = term.color(warning_color)(choice(tile_palette))
-            await asyncio.sleep(random()/70)
-            with term.location(*point):
-                print(tile_choice)
-        await asyncio.sleep(persist_delay)
+            delay += random()/70
+            keyframes.append((delay, screen_print, {'coord':point, 'text':tile_choice}))
+        delay += persist_delay
+    timeline.add(keyframes)
 
 async def fade_print(
     output_text="This is a test", 
@@ -6604,13 +8260,13 @@ async def fade_print(
     color_steps = [color_number for color_number in range(*fade_range)]
     if reverse_range:
         color_steps.reverse()
-    for index, color_num in enumerate(color_steps):
-        with term.location(*print_coord):
-            print(term.color(color_num)(output_text))
-        if index == 0:
-            await asyncio.sleep(fade_delay)
-        else:
-            await asyncio.sleep(step_delay)
+    keyframes = [
+        (fade_delay + (index - 1) * step_delay if index else 0, screen_print, {
+            'coord':print_coord, 'text':term.color(color_num)(output_text)
+        })
+        for index, color_num in enumerate(color_steps)
+    ]
+    await timeline.play(keyframes)
 
 async def distanced_fade_print(
     output_text="DRIP",
@@ -6651,6 +8307,10 @@ async def repeated_sound_message(
     """
     if rand_delay:
         await asyncio.sleep(random())
+    if source_actor != None:
+        sound_name = f'sound_{source_actor}'
+    else:
+        sound_name = f'sound_{sound_origin_coord}'
     while True:
         if state_dict['killall'] == True:
             break
@@ -6658,6 +8318,14 @@ async def repeated_sound_message(
             await asyncio.sleep(1 + random())
         else:
             await asyncio.sleep(1)
+        #sounds from further away have faded out before they're printed
+        #(see distanced_fade_print):
+        await wait_while_dormant(
+            name=sound_name,
+            coord=sound_origin_coord,
+            source_actor=source_actor,
+            activity_radius=41,
+        )
         await sound_message(
             output_text=output_text,
             sound_origin_coord=sound_origin_coord,
@@ -6696,32 +8364,136 @@ async def sound_message(
         fade_duration=fade_duration,
     )
 
-async def view_tile_init(
-    loop,
-    term_x_radius=40,
-    term_y_radius=20,
-    max_view_radius=17,
-    debug=False,
-):
-    view_tile_count = 0
+def view_tile_offsets(term_x_radius=40, term_y_radius=20, max_view_radius=17):
+    """
+    returns (distance, (x_offset, y_offset)) for every cell of the view,
+    nearest first.
+    """
     sorted_tiles = []
     for x in range(-term_x_radius, term_x_radius + 1):
        for y in range(-term_y_radius, term_y_radius + 1):
            distance = sqrt(x**2 + y**2) + random()/10
-           #cull view_tile instances that are beyond a certain radius
+           #cull cells that are beyond a certain radius
            if distance < max_view_radius:
                sorted_tiles.append((distance, (x, y)))
     sorted_tiles.sort()
-    for distance, (x_offset, y_offset) in sorted_tiles:
-        loop.create_task(
-            view_tile(
-                map_dict, x_offset=x_offset, y_offset=y_offset
-            )
-        )
-        view_tile_count += 1
-    if debug:
-        with term.location(50, 0):
-            print(f'view_tile_count: {view_tile_count}')
+    return sorted_tiles
+
+async def view_frame_loop(
+    term_x_radius=40,
+    term_y_radius=20,
+    max_view_radius=17,
+    frames_per_second=15,
+    fade_in=True,
+    debug=False,
+):
+    """
+    draws the whole field of view once per frame from a single task, then
+    flushes everything written to the screen buffer since the last frame.
+
+    with fade_in, each cell waits a random delay scaled by its distance
+    before it's first drawn so the view still bleeds in from the center.
+
+    the duration of the last frame (in seconds) is kept in
+    state_dict['frame time'].
+
+    errors in a cell, the particles or a whole frame are reported (once
+    each) and the loop carries on with the next cell or frame.
+    """
+    sorted_tiles = view_tile_offsets(
+        term_x_radius=term_x_radius,
+        term_y_radius=term_y_radius,
+        max_view_radius=max_view_radius,
+    )
+    if fade_in:
+        start_delays = {
+            offset:random()/5 * distance for distance, offset in sorted_tiles
+        }
+    else:
+        start_delays = {offset:0 for distance, offset in sorted_tiles}
+    frame_length = 1 / frames_per_second
+    #the view is culled to max_view_radius, only that much is read:
+    x_radius = min(term_x_radius, ceil(max_view_radius))
+    y_radius = min(term_y_radius, ceil(max_view_radius))
+    player_coords = actor_dict['player'].coords()
+    start_time = perf_counter()
+    reported_errors = set()
+
+    def report_once(message, error):
+        #a broken cell or particle fails every frame, report it the once:
+        if repr(error) not in reported_errors:
+            reported_errors.add(repr(error))
+            report_error(message, error)
+
+    #tweens still playing when the loop stops would otherwise never finish:
+    try:
+        while True:
+            if state_dict['killall'] == True:
+                break
+            frame_start = perf_counter()
+            try:
+                elapsed = frame_start - start_time
+                state_dict['animation phase'] += 1
+                timeline.advance(frame_start)
+                middle_x, middle_y = get_term_middle()
+                if not state_dict['lock view']:
+                    player_coords = actor_dict['player'].coords()
+                visible_coords = get_visible_coords(
+                    origin=player_coords, radius=max_view_radius + 1
+                )
+                update_visibility_snapshot(
+                    origin=player_coords, visible_coords=visible_coords
+                )
+                view_fields = read_view_fields(
+                    top_left=add_coords(player_coords, (-x_radius, -y_radius)),
+                    bottom_right=add_coords(
+                        player_coords, (x_radius + 1, y_radius + 1)
+                    ),
+                )
+                try:
+                    particle_hits = particle_pool.update()
+                except Exception as error:
+                    report_once('particle_pool.update failed', error)
+                    particle_hits = []
+                for coord, damage, source_actor in particle_hits:
+                    asyncio.ensure_future(
+                        damage_all_actors_at_coord(
+                            coord=coord, damage=damage, source_actor=source_actor
+                        )
+                    )
+                for distance, (x_offset, y_offset) in sorted_tiles:
+                    if elapsed < start_delays[x_offset, y_offset]:
+                        continue
+                    state_dict["view_tile_count"] += 1
+                    try:
+                        print_choice = await view_tile(
+                            x_offset=x_offset,
+                            y_offset=y_offset,
+                            distance=distance,
+                            player_coords=player_coords,
+                            visible_coords=visible_coords,
+                            view_fields=view_fields,
+                        )
+                    except Exception as error:
+                        report_once('a cell of the view failed to draw', error)
+                        print_choice = (' ', -1, -1)
+                    if state_dict['mirrored'] == True:
+                        print_tuple = (-x_offset, -y_offset)
+                    else:
+                        print_tuple = (x_offset, y_offset)
+                    print_location = add_coords((middle_x, middle_y), print_tuple)
+                    screen.set_cell(print_location, print_choice)
+                if debug:
+                    last_frame_time = state_dict['frame time'] * 1000
+                    screen_print(coord=(50, 0), text=f'frame time: {last_frame_time:.1f}ms')
+                screen.flush()
+            except Exception as error:
+                report_once('a frame of the view failed to draw', error)
+            frame_time = perf_counter() - frame_start
+            state_dict['frame time'] = frame_time
+            await asyncio.sleep(max(0, frame_length - frame_time))
+    finally:
+        timeline.stop()
 
 async def minimap_init(loop, box_width=21, box_height=21):
     width_span = range(-20, 21, 2)
@@ -6761,8 +8533,7 @@ async def minimap_init(loop, box_width=21, box_height=21):
         for i in range(randint(*static_amount)):
             y = randint(-10, 10)
             print_coord = add_coords((x_offset, y_offset), (-10, y))
-            with term.location(*print_coord):
-                print(term.green("".join(choice(' ░▒▓▄▀') * 21)))
+            screen_print(coord=print_coord, text=term.green("".join(choice(' ░▒▓▄▀') * 21)))
         await asyncio.sleep(random()/5)
 
 async def async_map_init():
@@ -7080,10 +8851,8 @@ def get_relative_ui_coord(x_offset, y_offset):
 async def printing_testing(distance=0, x_offset=-45, y_offset=1):
     x_coord, y_coord = get_relative_ui_coord(x_offset, y_offset)
     for number in range(10):
-        with term.location(number + x_coord, 2 + y_coord):
-            print(term.color(number)(str(number)))
-        with term.location(number + x_coord, 3 + y_coord):
-            print(term.on_color(number)(str(number)))
+        screen_print(coord=(number + x_coord, 2 + y_coord), text=term.color(number)(str(number)))
+        screen_print(coord=(number + x_coord, 3 + y_coord), text=term.on_color(number)(str(number)))
 
 async def status_bar(
     actor_name='player',
@@ -7110,8 +8879,7 @@ async def status_bar(
         bar_unfilled = bar_length - bar_filled
         bar_characters = "█" * bar_filled + "░" * bar_unfilled
         await asyncio.sleep(refresh_time)
-        with term.location(*print_coord):
-            print(f'{title}{term.color(bar_color)(bar_characters)}')
+        screen_print(coord=print_coord, text=f'{title}{term.color(bar_color)(bar_characters)}')
 
 async def player_coord_readout(
     x_offset=0, y_offset=0, refresh_time=.1, centered=True, debug=False
@@ -7133,11 +8901,9 @@ async def player_coord_readout(
         else:
             noise = "1234567890ABCDEF       ░░░░░░░░░░░ " 
             printed_coords = [''.join([choice(noise) for _ in range(2)]) for _ in range(3)]
-        with term.location(*add_coords(print_coord, (0, 1))):
-            print("x:{} y:{} z:{}     ".format(*printed_coords))
+        screen_print(coord=add_coords(print_coord, (0, 1)), text="x:{} y:{} z:{}     ".format(*printed_coords))
         if debug:
-            with term.location(*add_coords(print_coord, (0, 2))):
-                print("x:{} y:{}       ".format(*player_coords))
+            screen_print(coord=add_coords(print_coord, (0, 2)), text="x:{} y:{}       ".format(*player_coords))
 
 async def ui_setup():
     """
@@ -7254,6 +9020,95 @@ async def attack(
         actor_dict[defender_key].health = 0
     asyncio.ensure_future(directional_alert(source_actor=attacker_key))
 
+def compute_flow_field(origin=(0, 0), radius=30):
+    """
+    a breadth first search out from origin over passable tiles, moving in
+    the same eight directions as the actors do.
+
+    returns {coord: steps from origin} for every tile within radius steps.
+    actors aren't obstacles here, they're stepped around by seek_coord.
+    """
+    top_left = (origin[0] - radius, origin[1] - radius)
+    bottom_right = (origin[0] + radius + 1, origin[1] + radius + 1)
+    passable = map_dict.region('passable', top_left, bottom_right).tolist()
+    eight_offsets = [
+        dir_to_offset(offset) for offset in (
+            'n', 'e', 's', 'w', 'ne', 'se', 'sw', 'nw'
+        )
+    ]
+    steps = {origin:0}
+    frontier = [origin]
+    for step in range(1, radius + 1):
+        next_frontier = []
+        for x, y in frontier:
+            for x_offset, y_offset in eight_offsets:
+                coord = (x + x_offset, y + y_offset)
+                if coord in steps:
+                    continue
+                if not passable[coord[0] - top_left[0]][coord[1] - top_left[1]]:
+                    continue
+                steps[coord] = step
+                next_frontier.append(coord)
+        frontier = next_frontier
+    return steps
+
+def compute_safety_field(flow_field, flee_weight=-1.2):
+    """
+    turns a flow field into one for running away from its origin.
+
+    every tile starts at its steps scaled by flee_weight (so further is
+    lower) and is then relaxed so that a tile is never more than one step
+    worse than a neighbour. walking downhill leads away from the origin but
+    around it towards open space rather than into the nearest dead end.
+    """
+    eight_offsets = [
+        dir_to_offset(offset) for offset in (
+            'n', 'e', 's', 'w', 'ne', 'se', 'sw', 'nw'
+        )
+    ]
+    safety = {coord:steps * flee_weight for coord, steps in flow_field.items()}
+    queue = [(value, coord) for coord, value in safety.items()]
+    heapq.heapify(queue)
+    while queue:
+        value, (x, y) = heapq.heappop(queue)
+        if value > safety[x, y]:
+            continue
+        for x_offset, y_offset in eight_offsets:
+            neighbor = (x + x_offset, y + y_offset)
+            if neighbor in safety and value + 1 < safety[neighbor]:
+                safety[neighbor] = value + 1
+                heapq.heappush(queue, (value + 1, neighbor))
+    return safety
+
+def get_flow_field(origin=None, radius=30, flee=False):
+    """
+    returns the cached flow field (or with flee, safety field) around
+    origin, the player by default.
+
+    every actor seeking the same thing shares one field, which is only
+    rebuilt when terrain_changed has been called since it was made.
+    """
+    if origin == None:
+        origin = actor_dict['player'].coords()
+    if state_dict['flow fields version'] != state_dict['terrain version']:
+        state_dict['flow fields'] = {}
+        state_dict['flow fields version'] = state_dict['terrain version']
+    flow_fields = state_dict['flow fields']
+    field_key = (origin, radius, flee)
+    if field_key not in flow_fields:
+        #fields for places the player has since walked away from:
+        if len(flow_fields) > 16:
+            flow_fields.clear()
+        if flee:
+            flow_fields[field_key] = compute_safety_field(
+                get_flow_field(origin=origin, radius=radius)
+            )
+        else:
+            flow_fields[field_key] = compute_flow_field(
+                origin=origin, radius=radius
+            )
+    return flow_fields[field_key]
+
 async def seek_coord(
     name_key=None,
     target_coord=(0, 0),
@@ -7286,6 +9141,21 @@ async def seek_coord(
             lambda coord: is_passable(coord) == True,
             eight_adjacencies
         ))
+        #walk the shared flow field downhill where it reaches:
+        flow_field = get_flow_field(origin=target_coord, flee=repel)
+        if current_coord in flow_field:
+            open_spaces = [coord for coord in open_spaces if coord in flow_field]
+            if open_spaces == []:
+                return current_coord
+            #ties go to the nearest tile, or the farthest one when fleeing:
+            tie_sign = -1 if repel else 1
+            return_coord = min(open_spaces, key=lambda coord: (
+                flow_field[coord],
+                tie_sign * point_to_point_distance(coord, target_coord),
+            ))
+            if flow_field[return_coord] >= flow_field[current_coord]:
+                return current_coord
+            return return_coord
     distances = [
         point_to_point_distance(coord, target_coord) for coord in open_spaces
     ]
@@ -7299,6 +9169,145 @@ async def seek_coord(
         return_coord = open_spaces[output_index]
     return return_coord
 
+def find_path(
+    start=(0, 0),
+    goal=(0, 0),
+    walk_through_walls=False,
+    diagonals=True,
+    cut_corners=True,
+    max_nodes=5000,
+):
+    """
+    A* from start to goal over passable tiles.
+
+    with diagonals, steps can be taken in all eight directions at the same
+    cost as straight ones (like the actors move). without cut_corners a
+    diagonal step needs both of the straight tiles beside it to be open.
+
+    returns a tuple of the coords from start to goal, both included, or None
+    if the goal can't be reached within max_nodes searched tiles.
+    """
+    if diagonals:
+        offsets = (
+            (0, -1), (1, 0), (0, 1), (-1, 0), (1, -1), (1, 1), (-1, 1), (-1, -1)
+        )
+        def estimate(coord):
+            return max(abs(goal[0] - coord[0]), abs(goal[1] - coord[1]))
+    else:
+        offsets = ((0, -1), (1, 0), (0, 1), (-1, 0))
+        def estimate(coord):
+            return abs(goal[0] - coord[0]) + abs(goal[1] - coord[1])
+
+    def is_open(coord):
+        return walk_through_walls or map_dict.get_field(coord, 'passable')
+
+    came_from = {start:None}
+    cost_so_far = {start:0}
+    #the sequence number breaks ties between equally promising tiles:
+    queue = [(estimate(start), 0, start)]
+    sequence = 1
+    while queue and len(came_from) <= max_nodes:
+        _, _, current = heapq.heappop(queue)
+        if current == goal:
+            path = []
+            while current != None:
+                path.append(current)
+                current = came_from[current]
+            return tuple(reversed(path))
+        for x_offset, y_offset in offsets:
+            neighbor = (current[0] + x_offset, current[1] + y_offset)
+            if neighbor != goal and not is_open(neighbor):
+                continue
+            if x_offset and y_offset and not cut_corners:
+                if not (is_open((current[0] + x_offset, current[1])) and 
+                        is_open((current[0], current[1] + y_offset))):
+                    continue
+            new_cost = cost_so_far[current] + 1
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                came_from[neighbor] = current
+                heapq.heappush(
+                    queue, (new_cost + estimate(neighbor), sequence, neighbor)
+                )
+                sequence += 1
+    return None
+
+def get_path(
+    start=(0, 0),
+    goal=(0, 0),
+    walk_through_walls=False,
+    diagonals=True,
+    cut_corners=True,
+    region_size=8,
+    cache_size=64,
+):
+    """
+    returns the rest of a path from start to goal (start not included), or
+    None if there isn't one.
+
+    paths are cached by the region_size square start is in and the goal, so
+    actors starting near each other share one path as long as they're on
+    it. searches that failed are remembered by their exact start. the
+    cache keeps the cache_size most recently used entries and is emptied
+    when terrain_changed has been called.
+    """
+    if state_dict['path cache version'] != state_dict['terrain version']:
+        state_dict['path cache'] = OrderedDict()
+        state_dict['path cache version'] = state_dict['terrain version']
+    path_cache = state_dict['path cache']
+    start_region = (start[0] // region_size, start[1] // region_size)
+    path_key = (start_region, goal, walk_through_walls, diagonals, cut_corners)
+    failed_key = (start, goal, walk_through_walls, diagonals, cut_corners)
+    if failed_key in path_cache:
+        path_cache.move_to_end(failed_key)
+        return None
+    path = path_cache.get(path_key)
+    if path == None or start not in path:
+        path = find_path(
+            start=start,
+            goal=goal,
+            walk_through_walls=walk_through_walls,
+            diagonals=diagonals,
+            cut_corners=cut_corners,
+        )
+        if path == None:
+            path_key = failed_key
+        path_cache[path_key] = path
+        if len(path_cache) > cache_size:
+            path_cache.popitem(last=False)
+    path_cache.move_to_end(path_key)
+    if path == None:
+        return None
+    return path[path.index(start) + 1:]
+
+async def follow_path(
+    name_key=None,
+    target_coord=(0, 0),
+    walk_through_walls=False,
+    diagonals=True,
+    cut_corners=True,
+    **kwargs
+):
+    """
+    Takes the next step of an A* path towards target_coord.
+
+    Waits where it is when the next tile is taken or there's no way through.
+    """
+    current_coord = actor_dict[name_key].coords()
+    path = get_path(
+        start=current_coord,
+        goal=target_coord,
+        walk_through_walls=walk_through_walls,
+        diagonals=diagonals,
+        cut_corners=cut_corners,
+    )
+    if not path:
+        return current_coord
+    next_coord = path[0]
+    if not walk_through_walls and not is_passable(next_coord):
+        return current_coord
+    return next_coord
+
 async def seek_actor(
     name_key=None,
     seek_key='player',
@@ -7337,9 +9346,7 @@ async def waver(name_key=None, seek_key='player', **kwargs):
     Seeks player if out of sight, flees if within fov of player
     """
     actor_location = actor_dict[name_key].coords()
-    within_fov = check_point_within_arc(
-        checked_point=actor_location, arc_width=120
-    )
+    within_fov = seen_by_player(coord=actor_location, arc_width=120)
     distance_to_player = distance_to_actor(actor_a=name_key, actor_b='player')
     if distance_to_player >= 15:
         movement_choice = await wander(name_key=name_key)
@@ -7372,9 +9379,7 @@ async def angel_seek(
     Seeks only when the player isn't looking.
     """
     actor_location = actor_dict[name_key].coords()
-    within_fov = check_point_within_arc(
-        checked_point=actor_location, arc_width=150
-    )
+    within_fov = seen_by_player(coord=actor_location, arc_width=150)
     #if blinded, ignore fov check
     if within_fov and not state_dict['blinded']:
         return actor_location
@@ -7468,8 +9473,20 @@ def invert_coords(coord):
     return(-coord[0], -coord[1])
 
 def generate_id(base_name="name"):
-    current_time = str(datetime.time(datetime.now()))
-    return f'{base_name}_{current_time}'
+    """
+    a unique id starting with base_name, ending in an entity_registry handle.
+    """
+    return f'{base_name}_#{entity_registry.alloc(base_name):x}'
+
+def release_id(entity_id=''):
+    """
+    gives back the handle at the end of an id made by generate_id (or of a
+    name that ends with one) so that its slot can be reused.
+    """
+    handle_text = entity_id.rpartition('_#')[2]
+    if handle_text in ('', entity_id) or handle_text.strip('0123456789abcdef'):
+        return
+    entity_registry.free(int(handle_text, 16))
 
 def facing_dir_to_num(direction="n"):
     dir_to_num = {'n':0, 'e':1, 's':2, 'w':3}
@@ -7712,6 +9729,7 @@ async def basic_actor(
     moveable=True,
     made_of='material not set',
     leaves_body=True,
+    use_scheduler=True,
 ):
     """
     actors can:
@@ -7722,6 +9740,9 @@ async def basic_actor(
         make sounds #TODO
         die
         exist for a set number of turns
+
+    with use_scheduler the actor's turns are taken by actor_scheduler,
+    otherwise the actor runs its own loop.
     """
     actor_dict[(name_key)] = Actor(
         name=name_key,
@@ -7743,44 +9764,112 @@ async def basic_actor(
     )
     coords = actor_dict[name_key].coords()
     actor_dict[name_key].update(coord=coords)
+    if use_scheduler:
+        actor_scheduler.add(
+            name_key=name_key,
+            speed=speed,
+            movement_function=movement_function,
+            movement_function_kwargs=movement_function_kwargs,
+        )
+        return
     while True:
         if state_dict['killall'] == True:
             break
         await asyncio.sleep(speed)
-        if not hasattr(actor_dict[name_key], 'health'):
-            return
-        if actor_dict[name_key].health <= 0:
-            kill_actor(name_key=name_key)
-            return
-        next_coords = await movement_function(
-            name_key=name_key, **movement_function_kwargs
+        keep_going = await actor_turn(
+            name_key=name_key,
+            movement_function=movement_function,
+            movement_function_kwargs=movement_function_kwargs,
         )
-        #checked again here because actors can be pushed around
-        current_coords = actor_dict[name_key].coords()
-        if current_coords != next_coords:
-            #catch condition where player is dead and actor is missing(?):
-            if actor_dict['player'].health <= 0:
+        if not keep_going:
+            return
+
+async def actor_turn(
+    name_key=None, movement_function=wander, movement_function_kwargs={}
+):
+    """
+    one step of a basic_actor: checks that it's alive, picks where it goes
+    with its movement function and moves it there.
+
+    returns False once the actor shouldn't take any more turns.
+    """
+    state_dict['actor turns'] += 1
+    if not hasattr(actor_dict[name_key], 'health'):
+        return False
+    if actor_dict[name_key].health <= 0:
+        kill_actor(name_key=name_key)
+        return False
+    next_coords = await movement_function(
+        name_key=name_key, **movement_function_kwargs
+    )
+    #checked again here because actors can be pushed around
+    current_coords = actor_dict[name_key].coords()
+    if current_coords != next_coords:
+        #catch condition where player is dead and actor is missing(?):
+        if actor_dict['player'].health <= 0:
+            return False
+        dist_to_player = distance_to_actor(name_key, 'player')
+        #only show footfalls outside of current FOV:
+        point_in_fov = seen_by_player(coord=current_coords, arc_width=120)
+        if point_in_fov and not state_dict['blinded']:
+            return True
+        if dist_to_player ** 2 != 0:
+            noise_level = (1 / dist_to_player ** 2) * 5
+        else:
+            noise_level = 99
+        #TODO: an item that changes how many footfalls appear onscreen
+        # sets something in state dict when equipped and unequipped
+        #TODO: passive items: things that change some aspect of movement
+        #      or GUI or abilities without needing to be used.
+        if random() <= noise_level:
+            if dist_to_player < 20:
+                asyncio.ensure_future(
+                    directional_alert(source_actor=name_key, radius=dist_to_player, preset='footfall')
+                )
+        map_dict[next_coords].actors[name_key] = True
+        actor_dict[name_key].update(coord=next_coords)
+    return True
+
+def is_dormant(coord=(0, 0), name=None, activity_radius=30):
+    """
+    whether something at coord is too far from the player to be worth
+    running at full rate.
+
+    with a name, the answer is recorded in state_dict['activity tiers'] so
+    that activity_counts can report it.
+    """
+    distance = point_to_point_distance(coord, actor_dict['player'].coords())
+    dormant = distance > activity_radius
+    if name != None:
+        state_dict['activity tiers'][name] = 'dormant' if dormant else 'active'
+    return dormant
+
+async def wait_while_dormant(
+    name=None, coord=(0, 0), source_actor=None, activity_radius=30, dormant_delay=1
+):
+    """
+    sleeps dormant_delay at a time for as long as coord (or source_actor) is
+    further than activity_radius from the player, returns right away if it
+    isn't or if source_actor is gone.
+    """
+    while True:
+        if state_dict['killall'] == True:
+            break
+        if source_actor != None:
+            if source_actor not in actor_dict:
                 return
-            dist_to_player = distance_to_actor(name_key, 'player')
-            #only show footfalls outside of current FOV:
-            point_in_fov = check_point_within_arc(checked_point=current_coords, arc_width=120)
-            if point_in_fov and not state_dict['blinded']:
-                continue
-            if dist_to_player ** 2 != 0:
-                noise_level = (1 / dist_to_player ** 2) * 5
-            else:
-                noise_level = 99
-            #TODO: an item that changes how many footfalls appear onscreen
-            # sets something in state dict when equipped and unequipped
-            #TODO: passive items: things that change some aspect of movement
-            #      or GUI or abilities without needing to be used.
-            if random() <= noise_level:
-                if dist_to_player < 20:
-                    asyncio.ensure_future(
-                        directional_alert(source_actor=name_key, radius=dist_to_player, preset='footfall')
-                    )
-            map_dict[next_coords].actors[name_key] = True
-            actor_dict[name_key].update(coord=next_coords)
+            coord = actor_dict[source_actor].coords()
+        if not is_dormant(coord=coord, name=name, activity_radius=activity_radius):
+            return
+        await asyncio.sleep(dormant_delay)
+
+def forget_activity(name=None):
+    state_dict['activity tiers'].pop(name, None)
+
+def activity_counts():
+    """ how many named things were last active and how many dormant """
+    tiers = list(state_dict['activity tiers'].values())
+    return tiers.count('active'), tiers.count('dormant')
 
 def distance_to_actor(actor_a=None, actor_b='player'):
     if actor_a == None:
@@ -7805,8 +9894,11 @@ def kill_actor(name_key=None, leaves_body=True, blood=True):
         #delete MTE segment then try to split remaining segments:
         del mte_dict[parent_name].member_data[segment_key]
         mte_dict[parent_name].split_along_subregions()
+    if actor_dict[name_key].blocking or actor_dict[name_key].multi_tile_parent != None:
+        map_changed()
     del map_dict[actor_coords].actors[name_key]
     del actor_dict[name_key]
+    release_id(name_key)
     if blood:
         sow_texture(
             root_coord=actor_coords,
@@ -7892,10 +9984,30 @@ async def follower_vine(
     mte_dict[vine_name].vine_facing_dir = facing_dir
     if color_choice == None:
         color_choice = choice((1, 2, 3, 4, 5, 6, 7))
+
+    def vine_anchor():
+        #the vine, its root or its first segment can be destroyed at any time:
+        if vine_name not in mte_dict:
+            return None
+        if root_node_key != None:
+            anchor = root_node_key
+        elif mte_dict[vine_name].member_names:
+            anchor = mte_dict[vine_name].member_names[0]
+        else:
+            return None
+        return anchor if anchor in actor_dict else None
+
     while True:
         if state_dict['killall'] == True:
             break
         await asyncio.sleep(update_period)
+        if vine_anchor() == None:
+            forget_activity(vine_name)
+            break
+        await wait_while_dormant(name=vine_name, source_actor=vine_anchor())
+        if vine_anchor() == None:
+            forget_activity(vine_name)
+            break
         mte_dict[vine_name].vine_instructions = mte_vine_animation_step(
             mte_dict[vine_name].vine_instructions
         )
@@ -7953,10 +10065,8 @@ def rand_swap_on_pattern(
     head, tail = input_string[:start_index], input_string[end_index:]
     output_string = ''.join((head, replacement, tail))
     if debug:
-        with term.location(0, 0):
-            print(f' input: {input_string}')
-        with term.location(0, 1):
-            print(f'output: {output_string}')
+        screen_print(coord=(0, 0), text=f' input: {input_string}')
+        screen_print(coord=(0, 1), text=f'output: {output_string}')
     return output_string
 
 def mte_vine_animation_step(instructions, debug=False):
@@ -8031,13 +10141,10 @@ async def health_potion(
         if item_dict[item_id].uses <= 0:
             del item_dict[item_id]
             del actor_dict['player'].holding_items[item_id]
+            release_id(item_id)
     num_steps = duration / sub_second_step
     health_per_step = total_restored / num_steps
-    asyncio.ensure_future(
-        damage_numbers(
-            actor='player', damage=-total_restored
-        )
-    )
+    damage_numbers(actor='player', damage=-total_restored)
     for i in range(int(num_steps)):
         await asyncio.sleep(sub_second_step)
         if actor_dict['player'].health <= 0:
@@ -8196,6 +10303,7 @@ async def timed_actor(
     coords = actor_dict[name].coords() 
     del map_dict[coords].actors[name]
     del actor_dict[name]
+    release_id(name)
     if vanish_message != None:
         asyncio.ensure_future(
             sound_message(
@@ -8225,11 +10333,7 @@ async def beam_spire(spawn_coord=(0, 0)): #UNUSED
             player_distance = distance_to_actor(actor_a=turret_id, actor_b='player')
             if player_distance < 40:
                 for i in range(10):
-                    asyncio.ensure_future(
-                        projectile(
-                            actor_key=turret_id, firing_angle=angle
-                        )
-                    )
+                    projectile(actor_key=turret_id, firing_angle=angle)
                     if random() <= .005:
                         rand_coord = add_coords(spawn_coord, (randint(-10, 10), randint(-10, 10)))
                         asyncio.ensure_future(
@@ -8261,6 +10365,7 @@ async def repeating_particle_jet(
         if state_dict['killall'] == True:
             break
         await asyncio.sleep(off_interval)
+        await wait_while_dormant(name=f'particle_jet_{origin}', coord=origin)
         await particle_jet(
             origin=origin,
             facing=facing,
@@ -8287,19 +10392,17 @@ async def particle_jet(
     particle_count = round(duration / rate)
     base_angle = dir_to_angle(facing, mirror_ns=True) + offset
     for i in range(particle_count):
-        asyncio.ensure_future(
-            projectile(
-                radius=radius,
-                start_coords=origin, 
-                firing_angle=base_angle,
-                angle_spread=(-angle_spread, angle_spread),
-                radius_spread=radius_spread,
-                animation_preset=particle_preset,
-            )
+        projectile(
+            radius=radius,
+            start_coords=origin, 
+            firing_angle=base_angle,
+            angle_spread=(-angle_spread, angle_spread),
+            radius_spread=radius_spread,
+            animation_preset=particle_preset,
         )
         await asyncio.sleep(rate)
 
-async def projectile(
+def projectile(
     start_coords=(0, 0),
     actor_key=None,
     firing_angle=45,
@@ -8317,15 +10420,12 @@ async def projectile(
         angle=rand_angle, radius=rand_radius
     )
     end_coords = add_coords(start_coords, (x_shift, y_shift))
-    await travel_along_line(
-        name='particle', 
+    particle_pool.spawn(
         start_coords=start_coords, 
         end_coords=end_coords, 
         damage=damage, 
-        animation=Animation(preset=animation_preset), 
-        ignore_head=True,
+        preset=animation_preset, 
         source_actor=actor_key,
-        description="A cloud of scalding steam!"
     )
 
 def point_given_angle_and_radius(angle=0, radius=10):
@@ -8365,6 +10465,17 @@ def angle_point_to_point(
         a_angle = 360 - a_angle
     return a_angle
 
+def trim_line_at_wall(points):
+    """ the points of a line up to (not including) the first wall found """
+    if not points:
+        return points
+    passable, = map_dict.fields_along(points, ('passable',))
+    for index, point in enumerate(points):
+        #an impassable tile with nothing on it is a wall:
+        if not passable[index] and not map_dict[point].actors:
+            return points[:index]
+    return points
+
 async def travel_along_line(
     name='particle',
     start_coords=(0, 0),
@@ -8383,13 +10494,7 @@ async def travel_along_line(
 ):
     points = get_line(start_coords, end_coords)
     if no_clip:
-        for index, point in enumerate(points):
-            #not_passable = not map_dict[point].passable
-            not_passable = not is_passable(checked_coords=point)
-            no_actors = len(map_dict[point].actors) == 0
-            if not_passable and no_actors:
-                points = points[:index] #trim points past first wall found
-                break
+        points = trim_line_at_wall(points)
         if len(points) < 1:
             return
     particle_id = generate_id(base_name=name)
@@ -8440,6 +10545,7 @@ async def travel_along_line(
             map_dict[last_location].description = "Debris."
     del map_dict[last_location].actors[particle_id]
     del actor_dict[particle_id]
+    release_id(particle_id)
     if always_visible:
         map_dict[last_location].override_view = False
         if hide_after:
@@ -8455,10 +10561,10 @@ async def radial_fountain(
     collapse=True,
     debris=None,
     deathclock=None,
-    animation=Animation(preset='water')
+    animation_preset='water',
 ):
     """
-    creates a number of short lived actors that move towards or away from a
+    sends a number of particles (see Particle_pool) towards or away from a
     given actor, depending on collapse.
 
     speed determines the rate at which particles will travel.
@@ -8498,13 +10604,11 @@ async def radial_fountain(
             start_coords, end_coords = point, origin_coord
         else:
             start_coords, end_coords = origin_coord, point
-        asyncio.ensure_future(
-            travel_along_line(
-                start_coords=start_coords, 
-                end_coords=end_coords,
-                debris=debris,
-                animation=animation
-            )
+        particle_pool.spawn(
+            start_coords=start_coords, 
+            end_coords=end_coords,
+            preset=animation_preset,
+            debris=debris,
         )
         if deathclock:
             deathclock -= 1
@@ -8779,8 +10883,8 @@ async def spawn_preset_actor(
                 base_name='listener',
                 coord=coords,
                 speed=2,
-                movement_function=seek_coord, 
-                movement_function_kwargs={'target_coord':(50, 50)}, #TODO: seek_coord broken right now?
+                movement_function=follow_path, 
+                movement_function_kwargs={'target_coord':(50, 50)},
                 tile='@',
                 name_key=name,
                 hurtful=True,
@@ -8860,18 +10964,17 @@ async def minimap_tile(display_coord=(0, 0), player_position_offset=(0, 0)):
             break
         await asyncio.sleep(random()/2)
         if state_dict['scanner_state'] == False:
-            with term.location(*display_coord):
-                print(' ')
+            screen_print(coord=display_coord, text=' ')
             continue
         player_coord = actor_dict['player'].coords()
         bin_string = ''.join([
             one_for_passable(add_coords(player_coord, coord)) 
             for coord in listen_coords
         ])
-        actor_presence = any(
-            map_dict[add_coords(player_coord, coord)].actors
-            for coord in listen_coords
-        )
+        actor_presence = bool(actor_index.in_rect(
+            add_coords(player_coord, listen_coords[2]),
+            add_coords(player_coord, listen_coords[1]),
+        ))
         state_index = int(bin_string, 2)
         print_char = blocks[state_index]
         blink_state = next(blink_switch)
@@ -8882,12 +10985,23 @@ async def minimap_tile(display_coord=(0, 0), player_position_offset=(0, 0)):
                 print_choice = term.on_color(0)(term.green(print_char))
         else:
             print_choice = term.green(print_char)
-        with term.location(*display_coord):
-            print(print_choice)
+        screen_print(coord=display_coord, text=print_choice)
 
 def one_for_passable(map_coords=(0, 0)):
     return str(int(map_dict[map_coords].passable))
 
+async def occupancy_check_daemon(period=5):
+    """
+    runs check_occupancy every period seconds and logs what it finds.
+    (started by main when python is run in development mode, -X dev)
+    """
+    while True:
+        if state_dict['killall'] == True:
+            break
+        await asyncio.sleep(period)
+        for problem in check_occupancy()[:3]:
+            await append_to_log(message=f'occupancy: {problem}')
+
 async def quitter_daemon(debug=False):
     while True:
         await asyncio.sleep(0.2)
@@ -8953,6 +11067,8 @@ async def starting_messages():
 
 def state_setup():
     #state_dict setup
+    state_dict['map version'] = 0
+    state_dict['terrain version'] = 0
     actor_dict['player'].update((24, -5))
     state_dict['facing'] = 's'
     state_dict['just teleported'] = False
@@ -8963,6 +11079,12 @@ def state_setup():
     state_dict['known location'] = True
     state_dict['teleporting'] = False
     state_dict['view_tile_count'] = 0
+    state_dict['frame time'] = 0
+    state_dict['actor turns'] = 0
+    state_dict['animation phase'] = 0
+    state_dict['activity tiers'] = {}
+    state_dict['visibility snapshot'] = {}
+    state_dict['visibility facing'] = 0
     state_dict['scanner_state'] = False
     state_dict['lock view'] = False
     state_dict['passwall running'] = False
@@ -8984,7 +11106,8 @@ def main():
     loop = asyncio.new_event_loop()
     tasks = (
         get_key(map_dict),
-        view_tile_init(loop),
+        view_frame_loop(),
+        actor_scheduler.run(),
         quitter_daemon(),
         minimap_init(loop),
         ui_setup(),
@@ -9017,15 +11140,336 @@ def main():
         ),
         starting_messages()
     )
+    if sys.flags.dev_mode:
+        tasks += (occupancy_check_daemon(),)
     for task in tasks:
         loop.create_task(task)
     asyncio.set_event_loop(loop)
     result = loop.run_forever()
 
-with term.hidden_cursor():
-    old_settings = termios.tcgetattr(sys.stdin)
-    try:
-        main()
-    finally: 
-        clear()
-        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings) 
+#Benchmarks---------------------------------------------------------------------
+def traced_bytes(build_function):
+    """ how many bytes are still allocated after running build_function """
+    tracemalloc.start()
+    start_size = tracemalloc.get_traced_memory()[0]
+    kept = build_function()
+    end_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return end_size - start_size
+
+def memory_benchmark():
+    """
+    builds the map_init world, then rebuilds its tiles in three layouts and
+    prints the bytes used per materialised tile by each:
+
+        dict Map_tile:   the old layout, one object with a __dict__ and two
+                         defaultdicts for every tile
+        slotted Map_tile: one slotted Map_tile per tile, no containers
+        chunked map_dict: the numpy chunks plus rich_fields
+    """
+    state_setup()
+    map_init()
+    coords = list(map_dict.materialized_coords())
+
+    class Dict_tile:
+        pass
+
+    def build_dict_tiles():
+        tiles = []
+        for coord in coords:
+            tile = Dict_tile()
+            for field in Map_tile.__slots__:
+                setattr(tile, field, getattr(map_dict[coord], field))
+            tile.actors = defaultdict(lambda:None)
+            tile.items = defaultdict(lambda:None)
+            tiles.append(tile)
+        return tiles
+
+    def build_slotted_tiles():
+        tiles = []
+        for coord in coords:
+            tile = Map_tile()
+            for field in Map_tile.__slots__:
+                if field not in ('actors', 'items'):
+                    setattr(tile, field, getattr(map_dict[coord], field))
+            tiles.append(tile)
+        return tiles
+
+    def build_chunked_tiles():
+        store = Map_dict()
+        for coord in coords:
+            for field in store.array_fields:
+                if field != 'materialized':
+                    store.set_field(coord, field, map_dict.get_field(coord, field))
+            for field, field_values in map_dict.rich_fields.items():
+                if coord in field_values:
+                    store.set_field(coord, field, field_values[coord])
+        return store
+
+    layouts = (
+        ('dict Map_tile', build_dict_tiles),
+        ('slotted Map_tile', build_slotted_tiles),
+        ('chunked map_dict', build_chunked_tiles),
+    )
+    print(f'{len(coords)} materialized tiles')
+    for layout_name, build_function in layouts:
+        bytes_per_tile = traced_bytes(build_function) / len(coords)
+        print(f'{layout_name:>18}: {bytes_per_tile:8.1f} bytes per tile')
+
+def startup_benchmark(runs=3):
+    """
+    times map_init on a fresh map, the first run includes compiling the
+    tile presets.
+    """
+    for run in range(runs):
+        map_dict.__init__()
+        actor_index.clear()
+        item_index.clear()
+        state_setup()
+        start_time = perf_counter()
+        map_init()
+        elapsed = perf_counter() - start_time
+        print(f'run {run}: map_init took {elapsed:.3f}s, '
+              f'{map_dict.materialized_count()} materialized tiles')
+
+def passable_benchmark(calls=200000):
+    """
+    times is_passable against the two ways it used to be answered, in
+    microseconds per call over the tiles of the map_init world:
+
+        actor loop:  a dict of Map_tiles, scanning each tile's actors for a
+                     solid one (the original is_passable)
+        Tile_view:   map_dict[coord].solid_count and .passable
+        is_passable: both fields read straight from the chunk arrays
+    """
+    state_setup()
+    map_init()
+    coords = list(map_dict.materialized_coords())
+    checked = [coords[number % len(coords)] for number in range(calls)]
+    old_tiles = {}
+    for coord in coords:
+        old_tiles[coord] = Map_tile(passable=map_dict[coord].passable)
+        old_tiles[coord].actors = dict(map_dict[coord].actors)
+
+    def actor_loop(checked_coords):
+        has_no_actors = True
+        for actor_name in old_tiles[checked_coords].actors:
+            if actor_dict[actor_name].solid:
+                has_no_actors = False
+                break
+        return has_no_actors and old_tiles[checked_coords].passable
+
+    def tile_view(checked_coords):
+        has_no_actors = not map_dict[checked_coords].solid_count
+        return has_no_actors and map_dict[checked_coords].passable
+
+    methods = (
+        ('actor loop', actor_loop), 
+        ('Tile_view', tile_view), 
+        ('is_passable', is_passable),
+    )
+    for method_name, method in methods:
+        start_time = perf_counter()
+        for coord in checked:
+            method(coord)
+        per_call = (perf_counter() - start_time) / calls * 1e6
+        print(f'{method_name:>11}: {per_call:.3f}us per call')
+
+def stress_benchmark(actor_count=5000, speed=.5, duration=5):
+    """
+    runs actor_count wandering actors for duration seconds, first with one
+    basic_actor loop per actor and then through actor_scheduler, and prints
+    how many actor turns per second each managed and how busy the
+    process was doing it.
+    """
+    ideal_rate = actor_count / speed
+    for model_name, use_scheduler in (('task per actor', False), ('scheduler', True)):
+        map_dict.__init__()
+        actor_index.clear()
+        item_index.clear()
+        #every actor stays awake so both models do the same work:
+        actor_scheduler.__init__(activity_radius=float('inf'))
+        state_setup()
+        map_init()
+        state_dict['killall'] = False
+        open_coords = [
+            coord for coord in map_dict.materialized_coords()
+            if map_dict[coord].passable
+        ]
+        shuffle(open_coords)
+        names = [f'stress_{number}' for number in range(actor_count)]
+
+        async def run_model():
+            for name, coord in zip(names, cycle(open_coords)):
+                asyncio.ensure_future(basic_actor(
+                    coord=coord,
+                    speed=speed,
+                    movement_function=wander,
+                    name_key=name,
+                    use_scheduler=use_scheduler,
+                ))
+            scheduler_task = asyncio.ensure_future(actor_scheduler.run())
+            await asyncio.sleep(speed)
+            start_turns = state_dict['actor turns']
+            start_cpu = process_time()
+            await asyncio.sleep(duration)
+            turns = state_dict['actor turns'] - start_turns
+            cpu_time = process_time() - start_cpu
+            state_dict['killall'] = True
+            await scheduler_task
+            return turns, cpu_time
+
+        turns, cpu_time = asyncio.run(run_model())
+        for name in names:
+            del actor_dict[name]
+        rate = turns / duration
+        print(f'{model_name:>14}: {rate:8.1f} actor turns/s '
+              f'({rate / ideal_rate:.0%} of the {ideal_rate:.0f} asked for), '
+              f'{cpu_time / duration:.0%} cpu')
+
+def percentile(sorted_values, percent=50):
+    if not sorted_values:
+        return 0
+    return sorted_values[round(percent / 100 * (len(sorted_values) - 1))]
+
+def horde_benchmark(
+    actor_count=None, duration=10, all_awake=0, probe_interval=.01
+):
+    """
+    builds the standard map, spawns actor_count zombies, leeches and critters
+    through spawn_preset_actor and runs them (and the view) for duration
+    seconds. prints one line of JSON per run with the scheduler's ticks and
+    actor turns per second, how many of the horde were awake or dormant at
+    the end, event loop lag percentiles (ms), the task count and the peak
+    RSS.
+
+    by default the horde goes dormant outside of the scheduler's
+    activity_radius like it does in the game, with all_awake every actor
+    takes every turn.
+
+    without an actor_count it runs 10, 100, 1000 and 10000 actors in turn.
+    """
+    if actor_count == None:
+        actor_counts = (10, 100, 1000, 10000)
+    else:
+        actor_counts = (int(actor_count),)
+    for actor_count in actor_counts:
+        map_dict.__init__()
+        actor_index.clear()
+        item_index.clear()
+        actor_scheduler.__init__()
+        if all_awake:
+            actor_scheduler.activity_radius = float('inf')
+        particle_pool.__init__()
+        timeline.__init__()
+        text_overlay.clear()
+        for name in list(actor_dict):
+            if name != 'player':
+                del actor_dict[name]
+        state_setup()
+        map_init()
+        state_dict['killall'] = False
+        #the horde shouldn't be able to end the run early:
+        actor_dict['player'].health = 10 ** 9
+        #normally set up by angle_swing and console_box:
+        state_dict['current_angle'] = dir_to_angle(state_dict['facing'])
+        state_dict['messages'] = [('', 0)] * 10
+        open_coords = [
+            coord for coord in map_dict.materialized_coords()
+            if map_dict[coord].passable
+        ]
+        shuffle(open_coords)
+
+        async def run_horde():
+            presets = cycle(('zombie', 'leech', 'critter'))
+            #spawns that die or never reach the scheduler are retried, but
+            #only so many times:
+            attempts = range(actor_count * 2)
+            for _, coord, preset in zip(attempts, cycle(open_coords), presets):
+                if len(actor_scheduler.behaviors) >= actor_count:
+                    break
+                await spawn_preset_actor(coords=coord, preset=preset)
+                await asyncio.sleep(0)
+            horde = set(actor_scheduler.behaviors)
+            lags = []
+
+            async def lag_probe():
+                while True:
+                    if state_dict['killall'] == True:
+                        break
+                    probe_start = perf_counter()
+                    await asyncio.sleep(probe_interval)
+                    lags.append(perf_counter() - probe_start - probe_interval)
+
+            tasks = [
+                asyncio.ensure_future(actor_scheduler.run()),
+                asyncio.ensure_future(angle_swing()),
+                asyncio.ensure_future(view_frame_loop(fade_in=False)),
+                asyncio.ensure_future(lag_probe()),
+            ]
+            start_ticks = actor_scheduler.ticks
+            start_turns = state_dict['actor turns']
+            await asyncio.sleep(duration)
+            task_count = len(asyncio.all_tasks())
+            survivors = [name for name in horde if name in actor_dict]
+            dormant_count = sum(
+                is_dormant(
+                    coord=actor_dict[name].coords(),
+                    activity_radius=actor_scheduler.activity_radius,
+                )
+                for name in survivors
+            )
+            result = {
+                'actors':actor_count,
+                'spawned':len(horde),
+                'duration':duration,
+                'all_awake':bool(all_awake),
+                'ticks_per_second':(actor_scheduler.ticks - start_ticks) / duration,
+                'actor_turns_per_second':(state_dict['actor turns'] - start_turns) / duration,
+                'awake_actors':len(survivors) - dormant_count,
+                'dormant_actors':dormant_count,
+                'frame_time_ms':state_dict['frame time'] * 1000,
+                'tasks':task_count,
+                'tweens':timeline.active_count(),
+                'max_rss_kb':resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+            sorted_lags = sorted(lag * 1000 for lag in lags)
+            for percent in (50, 90, 99):
+                result[f'loop_lag_p{percent}_ms'] = percentile(sorted_lags, percent)
+            result['loop_lag_max_ms'] = percentile(sorted_lags, 100)
+            state_dict['killall'] = True
+            await asyncio.gather(*tasks)
+            return result
+
+        print(json.dumps(asyncio.run(run_horde())))
+
+benchmarks = {
+    'memory':memory_benchmark,
+    'startup':startup_benchmark,
+    'passable':passable_benchmark,
+    'stress':stress_benchmark,
+    'horde':horde_benchmark,
+}
+
+#run a benchmark with "python asyncio_game.py --benchmark <name> [args...]",
+#args are numbers passed in order to the benchmark function
+#or pick a renderer with "python asyncio_game.py --backend <blessed|ansi>"
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--benchmark':
+        screen.backend = Headless_backend(keep_cells=False)
+        benchmark_args = [
+            int(arg) if arg.lstrip('-').isdigit() else float(arg)
+            for arg in sys.argv[3:]
+        ]
+        benchmarks[sys.argv[2]](*benchmark_args)
+    else:
+        if len(sys.argv) > 2 and sys.argv[1] == '--backend':
+            screen.backend = render_backends[sys.argv[2]]()
+        with screen.backend.session():
+            old_settings = termios.tcgetattr(sys.stdin)
+            try:
+                main()
+            finally: 
+                clear()
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings) 